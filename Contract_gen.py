@@ -2,45 +2,11 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 from langsmith import traceable
-from langchain_community.vectorstores import FAISS
 from langchain.chat_models import AzureChatOpenAI
 from langchain.chains import RetrievalQA
-from langchain.embeddings import HuggingFaceEmbeddings
-from utils import load_contracts_from_folder, build_vector_store
-import language_tool_python
-import textstat
-import json
-
-# Open and load the full JSON file
-with open("contract_clause_keyword.json", "r") as f:
-    required_keywords = json.load(f)
-
- 
-def calculate_actqm(contract_text, contract_type, penalty_factor=0.5):
-    # Clause Coverage Score (CCS)
-    must_have_keywords = required_keywords.get(contract_type, [])
-    found_keywords = [kw for kw in must_have_keywords if kw.lower() in contract_text.lower()]
-    ccs = len(found_keywords) / len(must_have_keywords) if must_have_keywords else 0
- 
-    # Formality Score (FS) - less strict penalty
-    tool = language_tool_python.LanguageTool('en-US')
-    matches = tool.check(contract_text)
-    grammar_issues = len(matches)
-    sentence_count = max(textstat.sentence_count(contract_text), 1)
-    fs = 1 - penalty_factor * (grammar_issues / sentence_count)
-    fs = max(fs, 0)  # ensure FS not below zero
- 
-    # ACTQM Score
-    actqm = ((2 * ccs + fs) / 3) * 100
-    return {
-        "CCS": round(ccs, 2),
-        "FS": round(fs, 2),
-        "ACTQM": round(actqm, 2),
-        "Keywords Found": found_keywords,
-        "Total Required": len(must_have_keywords),
-        "Grammar Issues": grammar_issues,
-        "Sentences": sentence_count
-    }
+from utils import update_vector_store
+from docstore import has_index
+from actqm import calculate_actqm
 
 # Setup and configuration
 load_dotenv()
@@ -53,19 +19,27 @@ st.title("🤖 Contract Template Generator using Azure GPT-4o-mini + RAG")
 
 # Setup embedding index path
 EMBED_PATH = "embeddings"
-INDEX_FILE = os.path.join(EMBED_PATH, "index.faiss")
 
-# Load vector store
-if not os.path.exists(INDEX_FILE):
+TEMPLATES_PATH = "contract_templates"
+
+
+# Load vector store once per process, embedding only new or changed templates
+@st.cache_resource(show_spinner="🔄 Loading contract template index...")
+def get_template_vectordb():
+    vectordb = update_vector_store(TEMPLATES_PATH, EMBED_PATH)
+    if vectordb is None:
+        # Raised rather than returned so the empty result isn't cached
+        raise ValueError(f"No .txt contract templates found in '{TEMPLATES_PATH}'")
+    return vectordb
+
+
+if not has_index(EMBED_PATH):
     st.info("🔄 First-time setup: creating vector store from templates...")
-    docs = load_contracts_from_folder("contract_templates")
-    vectordb = build_vector_store(docs, EMBED_PATH)
-else:
-    vectordb = FAISS.load_local(
-        EMBED_PATH,
-        HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2"),
-        allow_dangerous_deserialization=True
-    )
+try:
+    vectordb = get_template_vectordb()
+except ValueError as e:
+    st.error(f"❌ {e}")
+    st.stop()
 
 retriever = vectordb.as_retriever(search_kwargs={"k": 3})
 
@@ -4,12 +4,12 @@ from docx import Document
 from io import BytesIO
 from langchain.chat_models import AzureChatOpenAI
 from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import FAISS
 from langchain.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import Docx2txtLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langsmith import traceable
 from dotenv import load_dotenv
+from utils import load_or_build_reference_indexes
+from retrievers import LanguagePartitionedRetriever
+from translation import split_into_chunks, translate_chunks, chunk_prompt
 
 # Load .env if using it
 load_dotenv()
@@ -42,19 +42,13 @@ selected_lang = st.selectbox("🌐 Translate to:", list(languages.keys()))
 
 # 📚 Reference Docs for RAG
 @st.cache_resource
-def build_retriever():
-    from pathlib import Path
-    folder = Path("reference_docs")
-    docs = []
-    for f in folder.glob("*.docx"):
-        docs.extend(Docx2txtLoader(str(f)).load())
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=80)
-    splits = text_splitter.split_documents(docs)
+def build_partitions():
     embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vectordb = FAISS.from_documents(splits, embedding)
-    return vectordb.as_retriever()
+    return load_or_build_reference_indexes(embedding), embedding
 
-retriever = build_retriever()
+# Uploaded templates are English; search only the English and target references
+partitions, embedding = build_partitions()
+retriever = LanguagePartitionedRetriever(partitions=partitions, languages=["English", selected_lang], embedding=embedding)
 
 # 🤖 LLM setup
 llm = AzureChatOpenAI(
@@ -62,7 +56,8 @@ llm = AzureChatOpenAI(
     openai_api_key=os.environ["AZURE_OPENAI_API_KEY"],
     azure_endpoint=AZURE_API_BASE,
     openai_api_version=AZURE_API_VERSION,
-    temperature=0.3
+    temperature=0.3,
+    streaming=True
 )
 qa = RetrievalQA.from_chain_type(llm=llm, retriever=retriever, return_source_documents=False)
 
@@ -72,11 +67,9 @@ if "history" not in st.session_state:
 # 🧠 Translation function
 @traceable(name="translate_doc_interaction")
 def translate_doc(doc_text: str, target_lang: str) -> str:
-    prompt = (
-        f"Translate the following contract into {target_lang.upper()} using similar legal structure and terminology "
-        f"as seen in the reference documents:\n\n{doc_text}"
-    )
-    return qa.run(prompt)
+    # Each chunk is its own RetrievalQA call, so it retrieves its own reference passages
+    chunks = split_into_chunks(doc_text.split("\n"))
+    return translate_chunks(chunks, lambda chunk, callbacks: qa.run(chunk_prompt(chunk, target_lang), callbacks=callbacks))
 
 # 🚀 Perform translation
 if st.button("🔄 Translate Document") and uploaded_file and selected_lang:
@@ -0,0 +1,218 @@
+"""
+ACTQM - Automated Contract Template Quality Metric shared by the generator pages
+"""
+
+import html
+import json
+import time
+import atexit
+import threading
+from collections import deque
+import language_tool_python
+import textstat
+from config import LANGUAGETOOL_MAX_CONCURRENCY, LANGUAGETOOL_QUEUE_TIMEOUT, LANGUAGETOOL_HEALTH_INTERVAL
+
+with open("contract_clause_keyword.json", "r") as f:
+    required_keywords = json.load(f)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over clause keywords.
+
+    Built once for the keywords of every contract type; ``find`` scans a text a
+    single time, case-insensitively, and reports every (possibly overlapping)
+    occurrence so that e.g. "Term" is still found inside "Termination".
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for keyword in dict.fromkeys(keywords):
+            state = 0
+            for ch in keyword.lower():
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._output[state].append(keyword)
+
+        # Breadth-first pass to wire failure links and inherit suffix outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find(self, text):
+        """Return ``{keyword: [(start, end), ...]}`` with offsets into ``text``."""
+        lowered = text.lower()
+        origin = None
+        if len(lowered) != len(text):
+            # A few characters lowercase to several; map offsets back to ``text``
+            origin = [i for i, c in enumerate(text) for _ in c.lower()] + [len(text)]
+        hits = {}
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword in output[state]:
+                start, end = i + 1 - len(keyword.lower()), i + 1
+                if origin is not None:
+                    start, end = origin[start], origin[end - 1] + 1
+                hits.setdefault(keyword, []).append((start, end))
+        return hits
+
+
+keyword_matcher = KeywordMatcher(kw for keywords in required_keywords.values() for kw in keywords)
+
+
+def clause_coverage(contract_text, contract_type):
+    """Clause Coverage Score plus the found keywords and their positions."""
+    must_have_keywords = required_keywords.get(contract_type, [])
+    hits = keyword_matcher.find(contract_text)
+    found_keywords = [kw for kw in must_have_keywords if kw in hits]
+    ccs = len(found_keywords) / len(must_have_keywords) if must_have_keywords else 0
+    return ccs, found_keywords, {kw: hits[kw] for kw in found_keywords}
+
+
+def highlight_keywords(contract_text, keyword_hits):
+    """HTML rendering of ``contract_text`` with keyword hits wrapped in <mark>."""
+    spans = sorted(span for positions in keyword_hits.values() for span in positions)
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    parts, cursor = [], 0
+    for start, end in merged:
+        parts.append(html.escape(contract_text[cursor:start]))
+        parts.append(f"<mark>{html.escape(contract_text[start:end])}</mark>")
+        cursor = end
+    parts.append(html.escape(contract_text[cursor:]))
+    return f'<div style="white-space: pre-wrap;">{"".join(parts)}</div>'
+
+
+class LanguageToolService:
+    """One warm LanguageTool server shared by every session in the process.
+
+    Callers beyond ``max_concurrent`` wait in line for a slot (up to
+    ``queue_timeout`` seconds); the server is health-checked periodically and
+    restarted when a check or a request fails.
+    """
+
+    def __init__(self, language="en-US", max_concurrent=2, queue_timeout=60, health_interval=300):
+        self.language = language
+        self.queue_timeout = queue_timeout
+        self.health_interval = health_interval
+        self.waiting = 0
+        self.restarts = 0
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._tool = None
+        self._last_health_check = 0.0
+
+    def _get_tool(self):
+        with self._lock:
+            if self._tool is None:
+                self._tool = language_tool_python.LanguageTool(self.language)
+                self._last_health_check = time.monotonic()
+            return self._tool
+
+    def restart(self):
+        with self._lock:
+            if self._tool is not None:
+                try:
+                    self._tool.close()
+                except Exception as e:
+                    print(f"⚠️ Error closing LanguageTool: {e}")
+                self._tool = None
+                self.restarts += 1
+
+    def is_healthy(self):
+        try:
+            self._get_tool().check("This is a health check.")
+            return True
+        except Exception:
+            return False
+
+    def check(self, text):
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.waiting -= 1
+        if not acquired:
+            raise TimeoutError(f"LanguageTool busy: no slot free after {self.queue_timeout}s")
+        try:
+            if time.monotonic() - self._last_health_check > self.health_interval:
+                if not self.is_healthy():
+                    self.restart()
+                self._last_health_check = time.monotonic()
+            try:
+                return self._get_tool().check(text)
+            except Exception as e:
+                # The Java server may have died underneath us; retry once on a fresh one
+                print(f"⚠️ LanguageTool request failed, restarting server: {e}")
+                self.restart()
+                return self._get_tool().check(text)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            if self._tool is not None:
+                self._tool.close()
+                self._tool = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_language_tool_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = LanguageToolService(
+                max_concurrent=LANGUAGETOOL_MAX_CONCURRENCY,
+                queue_timeout=LANGUAGETOOL_QUEUE_TIMEOUT,
+                health_interval=LANGUAGETOOL_HEALTH_INTERVAL
+            )
+            atexit.register(_service.close)
+        return _service
+
+
+def calculate_actqm(contract_text, contract_type, penalty_factor=0.5):
+    # Clause Coverage Score (CCS)
+    must_have_keywords = required_keywords.get(contract_type, [])
+    ccs, found_keywords, keyword_hits = clause_coverage(contract_text, contract_type)
+
+    # Formality Score (FS) - less strict penalty
+    matches = get_language_tool_service().check(contract_text)
+    grammar_issues = len(matches)
+    sentence_count = max(textstat.sentence_count(contract_text), 1)
+    fs = 1 - penalty_factor * (grammar_issues / sentence_count)
+    fs = max(fs, 0)  # ensure FS not below zero
+
+    # ACTQM Score
+    actqm = ((2 * ccs + fs) / 3) * 100
+    return {
+        "CCS": round(ccs, 2),
+        "FS": round(fs, 2),
+        "ACTQM": round(actqm, 2),
+        "Keywords Found": found_keywords,
+        "Keyword Hits": keyword_hits,
+        "Total Required": len(must_have_keywords),
+        "Grammar Issues": grammar_issues,
+        "Sentences": sentence_count
+    }
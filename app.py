@@ -5,25 +5,31 @@ A professional, AI-powered legal contract generation and translation platform
 """
 
 import os
-import time
-import json
+import math
+import uuid
+import logging
 from datetime import datetime, date
 from io import BytesIO
 import streamlit as st
 from streamlit_option_menu import option_menu
 from docx import Document
 from dotenv import load_dotenv
-from langchain.chat_models import AzureChatOpenAI
-from langchain.chains import RetrievalQA
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import Docx2txtLoader
 from langchain.schema import HumanMessage
 from langsmith import traceable
-import language_tool_python
-import textstat
-from utils import load_contracts_from_folder, build_vector_store, load_docs_from_folder
+from translation import split_into_chunks, translate_chunks, chunk_prompt
+from streaming import StreamlitTokenHandler
+from progress import ProgressReporter, ProgressCallback, GENERATION_STAGES, TRANSLATION_STAGES
+from config import LOG_LEVEL, HISTORY_PAGE_SIZE, HISTORY_CHAT_WINDOW
+from response_cache import run_cached
+from llm_gateway import request_context
+from resources import (
+    get_llm, get_translation_chain, get_response_cache, get_history_store, warm_up
+)
+from client_profiles import ensure_profile, format_profile
+from pipeline import CONTRACT_TYPES, get_client_chain, build_generation_query, generation_fields, run_revision, generate_contract_template, revise_contract
+from revision import revise
+from actqm import highlight_keywords
+from worker_service import get_worker
 
 import streamlit as st
 import os
@@ -31,70 +37,46 @@ import os
 os.environ["LANGCHAIN_API_KEY"] = st.secrets["LANGCHAIN_API_KEY"]
 
 load_dotenv()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 os.environ["LANGCHAIN_TRACING_V2"] = "true"
 # os.environ["LANGCHAIN_API_KEY"] = os.getenv("LANGCHAIN_API_KEY")
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-EMBED_PATH = "embeddings"
-INDEX_FILE = os.path.join(EMBED_PATH, "index.faiss")
-if not os.path.exists(INDEX_FILE):
-    st.info("🔄 First-time setup: creating vector store from templates...")
-    docs = load_contracts_from_folder("contract_templates")
-    vectordb = build_vector_store(docs, EMBED_PATH)
-else:
-    vectordb = FAISS.load_local(
-        EMBED_PATH,
-        HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2"),
-        allow_dangerous_deserialization=True
-    )
-    retriever = vectordb.as_retriever(search_kwargs={"k": 3})
-
-@st.cache_resource
-def build_retriever():
-    from pathlib import Path
-    folder = Path("reference_docs")
-    docs = []
-    for f in folder.glob("*.docx"):
-        docs.extend(Docx2txtLoader(str(f)).load())
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=80)
-    splits = text_splitter.split_documents(docs)
-    embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2", model_kwargs={"device": "cpu"})
-    vectordb = FAISS.from_documents(splits, embedding)
-    return vectordb.as_retriever()
-
-retriever1 = build_retriever()
-
-llm = AzureChatOpenAI(
-    openai_api_key=OPENAI_API_KEY,
-    azure_endpoint="https://openaiqc.gep.com/techathon/openai/deployments/gpt-4o-mini/chat/completions?api-version=2025-01-01-preview",
-    openai_api_version="2025-01-01-preview",
-    deployment_name="gpt-4o-mini",
-    temperature=0.3
-)
-
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    return_source_documents=False
-)
-
-qa_chain1 = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever1,
-    return_source_documents=False
-)
-
-@traceable(name="generate_contract_template_interaction")
-def generate_contract_template(query):
-    return qa_chain.run(query)
+# Models and indexes are built on first use; optionally start loading them now
+warm_up()
 
 @traceable(name="translate_doc_interaction")
-def translate_doc(doc_text: str, target_lang: str) -> str:
-    prompt = (
-        f"Translate the following contract into {target_lang.upper()} using similar legal structure and terminology "
-        f"as seen in the reference documents:\n\n{doc_text}"
+def translate_doc(doc_text: str, target_lang: str, source_lang: str = "English", on_update=None) -> str:
+    # Each chunk is its own RetrievalQA call, so it retrieves its own reference passages
+    # from the source and target language partitions only
+    chunks = split_into_chunks(doc_text.split("\n"))
+    qa_chain1, response_cache = get_translation_chain(source_lang, target_lang), get_response_cache()
+    return translate_chunks(
+        chunks,
+        lambda chunk, callbacks: run_cached(qa_chain1, chunk_prompt(chunk, target_lang), response_cache, callbacks=callbacks),
+        on_update=on_update
     )
-    return qa_chain1.run(prompt)
+
+def show_revision_diff(revision):
+    label = "🧩 Section edits applied" if revision.mode == "patch" else "🔁 Fully regenerated"
+    with st.expander(f"{label}: view changes"):
+        if revision.diff:
+            st.code(revision.diff, language="diff")
+        else:
+            st.caption("No changes were made.")
+
+def history_page(kind, key):
+    """One page of this session's previous results of ``kind`` (previews only), newest first."""
+    store = get_history_store()
+    total = store.count(st.session_state.session_id, kind, "assistant")
+    pages = max(1, math.ceil(total / HISTORY_PAGE_SIZE))
+    page = st.number_input(f"History page (of {pages})", min_value=1, max_value=pages, value=1, key=key) if pages > 1 else 1
+    return store.page(st.session_state.session_id, kind, "assistant", page, HISTORY_PAGE_SIZE)
+
+def show_history_entry(entry, label):
+    st.markdown(f"**{label}** · {datetime.fromtimestamp(entry.created_at):%H:%M} · _{entry.preview}…_")
+    # Full text is only read from disk when asked for
+    if st.checkbox("Show full text", key=f"show_{entry.id}"):
+        st.text_area(label, get_history_store().body(entry.id), height=300, key=f"body_{entry.id}")
 
 # Page configuration
 st.set_page_config(
@@ -422,6 +404,8 @@ if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Home"
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Load CSS
 load_css()
@@ -533,45 +517,13 @@ def contract_generation_page():
     </div>
     """, unsafe_allow_html=True)
     
-    with open("contract_clause_keyword.json", "r") as f:
-        required_keywords = json.load(f)
-
- 
-    def calculate_actqm(contract_text, contract_type, penalty_factor=0.5):
-        # Clause Coverage Score (CCS)
-        must_have_keywords = required_keywords.get(contract_type, [])
-        found_keywords = [kw for kw in must_have_keywords if kw.lower() in contract_text.lower()]
-        ccs = len(found_keywords) / len(must_have_keywords) if must_have_keywords else 0
-    
-        # Formality Score (FS) - less strict penalty
-        tool = language_tool_python.LanguageTool('en-US')
-        matches = tool.check(contract_text)
-        grammar_issues = len(matches)
-        sentence_count = max(textstat.sentence_count(contract_text), 1)
-        fs = 1 - penalty_factor * (grammar_issues / sentence_count)
-        fs = max(fs, 0)  # ensure FS not below zero
-    
-        # ACTQM Score
-        actqm = ((2 * ccs + fs) / 3) * 100
-        return {
-            "CCS": round(ccs, 2),
-            "FS": round(fs, 2),
-            "ACTQM": round(actqm, 2),
-            "Keywords Found": found_keywords,
-            "Total Required": len(must_have_keywords),
-            "Grammar Issues": grammar_issues,
-            "Sentences": sentence_count
-        }
-
-    if "history" not in st.session_state:
-        st.session_state.history = []
-
     # Back to Home button
     if st.button("🏠 Back to Home", key="back_home_generate"):
         st.session_state.current_page = "Home"
         st.rerun()
 
     result = None
+    progress = None
     st.markdown("""
     <div class="contract-form" style="background: #222222; border: None;">
         <h3>Contract Template Details</h3>
@@ -580,28 +532,23 @@ def contract_generation_page():
     
     # Contract category with icons
     categories = {
-        "🏠 NDA": "Non-Disclosure Agreement",
-        "🤝 MSA": "Master Services Agreement", 
-        "💼 Employment": "Employment Agreement",
-        "💰 Sponsorship": "Sponsorship Agreement",
+        "🏠 NDA": CONTRACT_TYPES["NDA"],
+        "🤝 MSA": CONTRACT_TYPES["MSA"],
+        "💼 Employment": CONTRACT_TYPES["Employment"],
+        "💰 Sponsorship": CONTRACT_TYPES["Sponsorship"],
     }
 
     client_name = st.selectbox("Select Client Folder", sorted(os.listdir("client_metadata")))
     category = st.selectbox("Contract Category", list(categories.keys()))
     contract_type = categories[category]
     
-    docs = load_docs_from_folder(os.path.join("client_metadata", client_name))
-    if docs and len(docs) > 0:
-        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        vectordb = FAISS.from_documents(docs, embeddings)
-        retriever2 = vectordb.as_retriever(search_kwargs={"k": 3})
-        qa_chain2 = RetrievalQA.from_chain_type(
-            llm=llm, 
-            retriever=retriever2
-        )
+    qa_chain2, client_hash = get_client_chain(client_name)
+    if qa_chain2 is not None:
+        # Start extracting the style profile while the rest of the form is filled in
+        profile_future = ensure_profile(client_name, client_hash, qa_chain2)
     else:
         st.error(f"No documents found in 'client_metadata/{client_name}'. Please check the folder or upload valid files.")
-        qa_chain2 = None  # Optional: prevent future crashes if qa_chain2 is used
+        profile_future = None
 
 
     # Effective date
@@ -616,23 +563,21 @@ def contract_generation_page():
     # Generate button
     if st.button("🚀 Generate Contract Language Template", use_container_width=True, type="primary") and category and effective_date:
         with st.spinner("Generating your contract..."):
-            # Simulate contract generation with building blocks animation
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            stages = ["Drafting...", "Reviewing...", "Finalizing..."]
-            for i, stage in enumerate(stages):
-                status_text.text(stage)
-                for j in range(33):
-                    time.sleep(0.02)
-                    progress_bar.progress((i * 33 + j + 1) * 100 // 100)
-            
-            prompt = "Analyze the client's contract style. Extract common clause types, writing tone, preferred keywords, and jurisdiction references. Return them in bullet points."
-            response = qa_chain2.run(prompt)
-            query = f"Create a detailed contract template for {contract_type}.Make sure that the generated template is based on {response}. Make sure it is formal, general-purpose, and does not include any party names.Value of the contract is {contract_value}. Jurisdiction is {jurisdiction}. Governing law is {governing_law}. Effective date is {effective_date}."
-            st.session_state.history.append(("user_gen", query))
-            result = generate_contract_template(query)
-            st.session_state.history.append(("ai_gen", result))
+            # Progress follows the real pipeline stages (retrieval/LLM events come from LangChain callbacks)
+            progress = ProgressReporter(GENERATION_STAGES, st.progress(0), st.empty(), pipeline="generation")
+
+            # Usually already on disk; only a new or edited client folder waits for the LLM here
+            progress.start("client_style")
+            response = format_profile(profile_future.result())
+            query = build_generation_query(contract_type, response, contract_value, jurisdiction, governing_law, effective_date)
+            get_history_store().append(st.session_state.session_id, "gen", "user", query)
+            stream_box = st.empty()
+            fields = generation_fields(contract_type, contract_value, jurisdiction, governing_law, effective_date)
+            result = generate_contract_template(
+                query, callbacks=[StreamlitTokenHandler(stream_box), ProgressCallback(progress)], fields=fields
+            )
+            stream_box.empty()
+            get_history_store().append(st.session_state.session_id, "gen", "assistant", result)
             st.success("Contract generated successfully!")
 
     if result:
@@ -649,7 +594,12 @@ def contract_generation_page():
             st.info("Human review request sent! A legal expert will review your contract within 24 hours.")
         
         st.subheader("📊 ACTQM: Automated Quality Evaluation")
-        metrics = calculate_actqm(result, contract_type.strip())
+        if progress is not None:
+            progress.start("scoring")
+        metrics = get_worker().score_contract(result, contract_type.strip())
+        if progress is not None:
+            progress.finish()
+            st.caption(f"⏱️ {progress.summary()}")
         st.markdown(f"""
         <style>
             .metric-card {{
@@ -688,42 +638,48 @@ def contract_generation_page():
             </ul>
         </div>
     """, unsafe_allow_html=True)
-
-
-    # Feedback and history
-    for i, (role, msg) in enumerate(st.session_state.history):
-        if role == "ai_gen":
-            feedback_key = f"feedback_{i}"
-            feedback = st.radio(
-                "Was this response helpful?",
-                ("👍 Yes", "👎 No"),
-                key=feedback_key
-            )
-            if feedback == "👍 Yes":
-                st.success("✅ Thanks for your feedback!")
-            elif feedback == "👎 No":
-                st.warning("❗ We appreciate your feedback and will improve.")
-                client_feedback = st.text_input("Please provide the changes you require:", key=f"feedback_text_{i}")
-                if st.button("Submit changes", key=f"submit_changes_{i}") and client_feedback:
-                    modified_query = f"Make the changes to {msg} based on the feedback: {client_feedback}"
-                    modified_result = generate_contract_template(modified_query)
-                    st.session_state.history.append(("ai_gen", modified_result))
-                    st.subheader("📑 Modified Contract Template")
-                    st.text_area("Modified Template", modified_result, height=400)
-                    filename = f"{contract_type.title().replace(' ', '_')}_template.txt"
-                    with open(filename, "w", encoding="utf-8") as f:
-                        f.write(modified_result)
-                    with open(filename, "rb") as f:
-                        st.download_button("📥 Download Template as Text File", f, file_name=filename, mime="text/plain", use_container_width=True)
-                    if st.button("👨‍💼 Request Human Review", use_container_width=True):
-                        st.info("Human review request sent! A legal expert will review your contract within 24 hours.")
-                    st.subheader("📊 ACTQM: Automated Quality Evaluation")
-                    metrics = calculate_actqm(modified_result, contract_type.strip())
-                    st.markdown(f"""
-                        - **Clause Coverage Score (CCS)**: `{metrics['CCS']} ({len(metrics['Keywords Found'])}/{metrics['Total Required']} keywords found)`
-                        - **Formality Score (FS)**: `{metrics['FS']} ({metrics['Grammar Issues']} issues in {metrics['Sentences']} sentences)`
-                        - **✅ ACTQM**: `{metrics['ACTQM']}`
-                        """)
+        with st.expander(f"🔍 Clause keywords found ({len(metrics['Keywords Found'])}/{metrics['Total Required']})"):
+            st.markdown(highlight_keywords(result, metrics["Keyword Hits"]), unsafe_allow_html=True)
+
+
+    # Feedback and history, one page at a time
+    for entry in history_page("gen", "history_page_gen"):
+        show_history_entry(entry, "📄 Contract Template")
+        feedback_key = f"feedback_{entry.id}"
+        feedback = st.radio(
+            "Was this response helpful?",
+            ("👍 Yes", "👎 No"),
+            key=feedback_key
+        )
+        if feedback == "👍 Yes":
+            st.success("✅ Thanks for your feedback!")
+        elif feedback == "👎 No":
+            st.warning("❗ We appreciate your feedback and will improve.")
+            client_feedback = st.text_input("Please provide the changes you require:", key=f"feedback_text_{entry.id}")
+            if st.button("Submit changes", key=f"submit_changes_{entry.id}") and client_feedback:
+                msg = get_history_store().body(entry.id)
+                stream_box = st.empty()
+                revision = revise_contract(msg, client_feedback, callbacks=[StreamlitTokenHandler(stream_box)])
+                stream_box.empty()
+                modified_result = revision.text
+                get_history_store().append(st.session_state.session_id, "gen", "assistant", modified_result)
+                st.subheader("📑 Modified Contract Template")
+                st.text_area("Modified Template", modified_result, height=400)
+                show_revision_diff(revision)
+                filename = f"{contract_type.title().replace(' ', '_')}_template.txt"
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.write(modified_result)
+                with open(filename, "rb") as f:
+                    st.download_button("📥 Download Template as Text File", f, file_name=filename, mime="text/plain", use_container_width=True)
+                if st.button("👨‍💼 Request Human Review", use_container_width=True):
+                    st.info("Human review request sent! A legal expert will review your contract within 24 hours.")
+                st.subheader("📊 ACTQM: Automated Quality Evaluation")
+                metrics = get_worker().score_contract(modified_result, contract_type.strip())
+                st.markdown(f"""
+                    - **Clause Coverage Score (CCS)**: `{metrics['CCS']} ({len(metrics['Keywords Found'])}/{metrics['Total Required']} keywords found)`
+                    - **Formality Score (FS)**: `{metrics['FS']} ({metrics['Grammar Issues']} issues in {metrics['Sentences']} sentences)`
+                    - **✅ ACTQM**: `{metrics['ACTQM']}`
+                    """)
 
 # Translation Portal
 def translation_page():
@@ -734,9 +690,6 @@ def translation_page():
     </div>
     """, unsafe_allow_html=True)
 
-    if "history" not in st.session_state:
-        st.session_state.history = []
-
     # Back to Home button
     if st.button("🏠 Back to Home", key="back_home_translate"):
         st.session_state.current_page = "Home"
@@ -768,18 +721,23 @@ def translation_page():
         # Translate button
         if st.button("🌐 Translate Document", use_container_width=True, type="primary"):
             with st.spinner("Translating your document..."):
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.03)
-                    progress_bar.progress(i + 1)
-                
+                progress = ProgressReporter(TRANSLATION_STAGES, st.progress(0), st.empty(), pipeline="translation")
+
+                progress.start("parse")
                 doc = Document(uploaded_file)
                 full_text = "\n".join([p.text for p in doc.paragraphs])
 
-                with st.spinner("🔄 Translating..."):
-                    st.session_state.history.append(("user_trans", full_text))
-                    translated = translate_doc(full_text, target_language)
-                    st.session_state.history.append(("ai_trans", translated))
+                get_history_store().append(st.session_state.session_id, "trans", "user", full_text)
+                progress.start("translation")
+                stream_box = st.empty()
+
+                def show_partial(text, done, total):
+                    stream_box.markdown(text + "▌")
+                    progress.advance(done / total)
+
+                translated = translate_doc(full_text, target_language, source_language, on_update=show_partial)
+                stream_box.empty()
+                get_history_store().append(st.session_state.session_id, "trans", "assistant", translated)
 
                 st.success("✅ Translation complete!")
 
@@ -788,14 +746,10 @@ def translation_page():
                 st.text_area("Review the translated document below:", translated, height=400)
 
                 # 📄 Create translated DOCX
-                translated_doc = Document()
-                for para in translated.split("\n"):
-                    if para.strip():
-                        translated_doc.add_paragraph(para.strip())
-
-                output = BytesIO()
-                translated_doc.save(output)
-                output.seek(0)
+                progress.start("docx")
+                output = BytesIO(get_worker().render_docx(translated))
+                progress.finish()
+                st.caption(f"⏱️ {progress.summary()}")
 
                 st.download_button(
                     label="📥 Download Translated DOCX",
@@ -805,42 +759,49 @@ def translation_page():
                     use_container_width=True
                 )
                 
-        # User feedback section
-        for i, (role, msg) in enumerate(st.session_state.history):
-            if role == "ai_trans":
-                feedback_key = f"feedback_{i}"
-                feedback = st.radio(
-                    "Was this response helpful?",
-                    ("👍 Yes", "👎 No"),
-                    key=feedback_key
-                )
-                if feedback == "👍 Yes":
-                    st.success("✅ Thanks for your feedback!")
-                elif feedback == "👎 No":
-                    st.warning("❗ Please provide what changes you would want to see.")
-                    client_feedback = st.text_input("Please provide the changes you require:", key=f"feedback_text_{i}")
-                    if st.button("Submit changes", key=f"submit_changes_{i}") and client_feedback:
-                        modified_query = f"Make the changes to: {msg} based on the feedback: {client_feedback}"
-                        modified_result = qa_chain1.run(modified_query)
-                        st.session_state.history.append(("ai_trans", modified_result))
-                        st.subheader("📑 Modified Language Template Translation")
-                        st.text_area("Modified Translation", modified_result, height=400)
-                        translated_doc = Document()
-                        for para in modified_result.split("\n"):
-                            if para.strip():
-                                translated_doc.add_paragraph(para.strip())
-
-                        output = BytesIO()
-                        translated_doc.save(output)
-                        output.seek(0)
-
-                        st.download_button(
-                            label="📥 Download Translated DOCX",
-                            data=output,
-                            file_name=f"translated_{target_language}.docx",
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                            use_container_width=True
-                        )
+        # User feedback section, one page at a time
+        for entry in history_page("trans", "history_page_trans"):
+            show_history_entry(entry, "🌐 Translation")
+            feedback_key = f"feedback_{entry.id}"
+            feedback = st.radio(
+                "Was this response helpful?",
+                ("👍 Yes", "👎 No"),
+                key=feedback_key
+            )
+            if feedback == "👍 Yes":
+                st.success("✅ Thanks for your feedback!")
+            elif feedback == "👎 No":
+                st.warning("❗ Please provide what changes you would want to see.")
+                client_feedback = st.text_input("Please provide the changes you require:", key=f"feedback_text_{entry.id}")
+                if st.button("Submit changes", key=f"submit_changes_{entry.id}") and client_feedback:
+                    msg = get_history_store().body(entry.id)
+                    stream_box = st.empty()
+                    revision = revise(
+                        msg, client_feedback, get_llm(),
+                        lambda callbacks: run_revision(
+                            lambda query: run_cached(
+                                get_translation_chain(source_language, target_language),
+                                query, get_response_cache(), callbacks=callbacks
+                            ),
+                            msg, client_feedback
+                        ),
+                        callbacks=[StreamlitTokenHandler(stream_box)]
+                    )
+                    stream_box.empty()
+                    modified_result = revision.text
+                    get_history_store().append(st.session_state.session_id, "trans", "assistant", modified_result)
+                    st.subheader("📑 Modified Language Template Translation")
+                    st.text_area("Modified Translation", modified_result, height=400)
+                    show_revision_diff(revision)
+                    output = BytesIO(get_worker().render_docx(modified_result))
+
+                    st.download_button(
+                        label="📥 Download Translated DOCX",
+                        data=output,
+                        file_name=f"translated_{target_language}.docx",
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                        use_container_width=True
+                    )
 
 # AI Assistant
 def ai_assistant_page():
@@ -859,21 +820,26 @@ def ai_assistant_page():
     # Chat interface
     st.markdown("### 💬 Chat with LegalMind")
     
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Hello! I'm LegalMind, your AI legal assistant. I can help you with contract generation, legal questions, and document analysis. How can I assist you today?"}
-        ]
-    
+    # Chat history lives on disk; only the most recent window is rendered
+    store = get_history_store()
+    if "chat_window" not in st.session_state:
+        st.session_state.chat_window = HISTORY_CHAT_WINDOW
+    if store.count(st.session_state.session_id, "chat") > st.session_state.chat_window:
+        if st.button("⬆️ Show earlier messages"):
+            st.session_state.chat_window += HISTORY_CHAT_WINDOW
+    else:
+        with st.chat_message("assistant"):
+            st.markdown("Hello! I'm LegalMind, your AI legal assistant. I can help you with contract generation, legal questions, and document analysis. How can I assist you today?")
+
     # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    for message in store.recent(st.session_state.session_id, "chat", st.session_state.chat_window):
+        with st.chat_message(message.role):
+            st.markdown(message.body)
     
     # Chat input
     if prompt := st.chat_input("Ask me anything about legal contracts..."):
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        store.append(st.session_state.session_id, "chat", "user", prompt)
         
         # Display user message
         with st.chat_message("user"):
@@ -881,13 +847,12 @@ def ai_assistant_page():
         
         # Generate AI response
         with st.chat_message("assistant"):
-            with st.spinner("LegalMind is thinking..."):
-                # Simulate AI response
-                time.sleep(1)
-                
-                response = llm([HumanMessage(content=prompt)]).content              
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            # Tokens are drawn into the placeholder as they arrive
+            placeholder = st.empty()
+            placeholder.markdown("LegalMind is thinking...")
+            response = get_llm()([HumanMessage(content=prompt)], callbacks=[StreamlitTokenHandler(placeholder)]).content
+            placeholder.markdown(response)
+            store.append(st.session_state.session_id, "chat", "assistant", response)
     
     # Quick actions
     st.markdown("### ⚡ Quick Actions")
@@ -1015,21 +980,22 @@ def main():
     # Create custom header
     create_header()
     
-    # Page routing
+    # Page routing; LLM calls are tagged with this session for fair scheduling in the gateway
     current_page = st.session_state.current_page
     
-    if current_page == "Home":
-        home_page()
-    elif current_page == "Generate Contract":
-        contract_generation_page()
-    elif current_page == "Translate Document":
-        translation_page()
-    elif current_page == "AI Assistant":
-        ai_assistant_page()
-    elif current_page == "About":
-        about_page()
-    elif current_page == "Contact":
-        contact_page()
+    with request_context(st.session_state.session_id):
+        if current_page == "Home":
+            home_page()
+        elif current_page == "Generate Contract":
+            contract_generation_page()
+        elif current_page == "Translate Document":
+            translation_page()
+        elif current_page == "AI Assistant":
+            ai_assistant_page()
+        elif current_page == "About":
+            about_page()
+        elif current_page == "Contact":
+            contact_page()
     
     # Floating AI Assistant (always visible)
     st.markdown("""
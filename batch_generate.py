@@ -0,0 +1,124 @@
+"""
+Headless batch contract generation
+
+Reads jobs from a CSV or JSONL file with the columns client, contract_category,
+jurisdiction, governing_law, contract_value and effective_date (plus an
+optional id), runs each through the same pipeline as the generation page and
+writes the templates and a results.jsonl with ACTQM metrics to an output
+directory. results.jsonl doubles as the checkpoint: rerunning the same command
+skips jobs that already succeeded.
+
+    python batch_generate.py jobs.csv --out batch_output --concurrency 4
+"""
+
+import os
+import csv
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import BATCH_CONCURRENCY, BATCH_RETRIES
+from llm_gateway import request_context, BATCH_PRIORITY, TRANSIENT_ERRORS
+from pipeline import generate_contract, resolve_contract_type
+
+logger = logging.getLogger("joels_angels.batch")
+
+JOB_FIELDS = ("client", "contract_category", "jurisdiction", "governing_law", "contract_value", "effective_date")
+RESULTS_FILE = "results.jsonl"
+
+
+def load_jobs(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    jobs = []
+    for row in rows:
+        missing = [field for field in JOB_FIELDS if not str(row.get(field, "")).strip()]
+        if missing:
+            raise ValueError(f"Job {row} is missing {', '.join(missing)}")
+        job = {field: str(row[field]).strip() for field in JOB_FIELDS}
+        job["id"] = str(row.get("id") or "").strip() or hashlib.sha1(
+            json.dumps(job, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        jobs.append(job)
+    return jobs
+
+
+def completed_job_ids(out_dir):
+    path = os.path.join(out_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {record["id"] for record in map(json.loads, filter(str.strip, f)) if record["status"] == "ok"}
+
+
+def run_job(job, out_dir, retries):
+    contract_type = resolve_contract_type(job["contract_category"])
+    for attempt in range(retries + 1):
+        try:
+            # Batch work queues behind interactive sessions in the LLM gateway
+            with request_context("batch", BATCH_PRIORITY):
+                outcome = generate_contract(
+                    job["client"], contract_type, job["jurisdiction"], job["governing_law"],
+                    job["contract_value"], job["effective_date"]
+                )
+            break
+        except TRANSIENT_ERRORS as e:
+            # Anything else (bad row data, unknown client) fails the same way every time
+            if attempt == retries:
+                raise
+            delay = min(2 ** attempt, 30) * (0.5 + random.random())
+            logger.warning("job %s failed (%s), retrying in %.1fs", job["id"], e, delay)
+            time.sleep(delay)
+    filename = f"{job['id']}_{contract_type.title().replace(' ', '_')}_template.txt"
+    with open(os.path.join(out_dir, filename), "w", encoding="utf-8") as f:
+        f.write(outcome["text"])
+    metrics = {k: v for k, v in outcome["metrics"].items() if k != "Keyword Hits"}
+    return {"id": job["id"], "status": "ok", "file": filename, "attempts": attempt + 1, "metrics": metrics}
+
+
+def run_batch(jobs, out_dir, concurrency=BATCH_CONCURRENCY, retries=BATCH_RETRIES):
+    os.makedirs(out_dir, exist_ok=True)
+    done = completed_job_ids(out_dir)
+    pending = [job for job in jobs if job["id"] not in done]
+    logger.info("%d jobs, %d already done, %d to run", len(jobs), len(jobs) - len(pending), len(pending))
+    results_lock = threading.Lock()
+    summary = {"ok": 0, "failed": 0, "skipped": len(jobs) - len(pending)}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(run_job, job, out_dir, retries): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                logger.error("job %s failed: %s", job["id"], e)
+                record = {"id": job["id"], "status": "failed", "error": str(e)}
+            record["job"] = job
+            summary[record["status"]] += 1
+            with results_lock, open(os.path.join(out_dir, RESULTS_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate contract templates in bulk")
+    parser.add_argument("jobs", help="CSV or JSONL file of generation jobs")
+    parser.add_argument("--out", default="batch_output", help="Directory for templates and results.jsonl")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=BATCH_RETRIES)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    summary = run_batch(load_jobs(args.jobs), args.out, args.concurrency, args.retries)
+    print(f"✅ {summary['ok']} generated, ❌ {summary['failed']} failed, ⏭️ {summary['skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
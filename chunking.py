@@ -0,0 +1,78 @@
+"""
+Structure-aware chunking for client agreements
+
+Client contracts are long and numbered ("ARTICLE 4.", "4.2 Insurance."), so they
+are split at clause boundaries rather than at a fixed character count. Short
+neighbouring clauses are packed together, oversized ones are windowed with
+overlap, and every chunk records where it came from in the source file.
+"""
+
+import re
+from langchain.docstore.document import Document
+from config import CLIENT_CHUNK_CHARS, CLIENT_CHUNK_OVERLAP
+
+# Bump when the splitting rules change so persisted client indexes are rebuilt
+CHUNKER_VERSION = "clauses-v1"
+
+CLAUSE_HEADING = re.compile(
+    r"^[ \t]*(?:"
+    r"(?:ARTICLE|Article|SECTION|Section|CLAUSE|Clause|SCHEDULE|Schedule|EXHIBIT|Exhibit)\s+[0-9IVXLC]+\b"  # ARTICLE 4.
+    r"|\d{1,3}(?:\.\d{1,3})*\.?[ \t]+[A-Z(]"                                # 4.2 Insurance / 12. Notices
+    r"|[A-Z][A-Z0-9 ,;&'()\-]{3,80}[ \t]*$"                                  # RECITALS
+    r")",
+    re.MULTILINE
+)
+
+# Preferred places to end a window, strongest first
+_BREAKS = ("\n\n", "\n", ". ", "; ", " ")
+
+
+def _clause_spans(text):
+    starts = sorted({0} | {m.start() for m in CLAUSE_HEADING.finditer(text)})
+    return [(s, e) for s, e in zip(starts, starts[1:] + [len(text)]) if text[s:e].strip()]
+
+
+def _window_spans(text, start, end, max_chars, overlap):
+    """Cut an oversized clause into overlapping windows ending at natural breaks."""
+    spans = []
+    while end - start > max_chars:
+        limit = start + max_chars
+        cut = limit
+        for sep in _BREAKS:
+            pos = text.rfind(sep, start + max_chars // 2, limit)
+            if pos != -1:
+                cut = pos + len(sep)
+                break
+        spans.append((start, cut))
+        next_start = max(cut - overlap, start + 1)
+        # Begin the overlap on a word boundary
+        space = text.find(" ", next_start, cut)
+        start = space + 1 if overlap and space != -1 else next_start
+    spans.append((start, end))
+    return spans
+
+
+def split_clauses(doc, max_chars=CLIENT_CHUNK_CHARS, overlap=CLIENT_CHUNK_OVERLAP):
+    """Split one document into clause-level chunks with ``start_index``/``end_index`` offsets."""
+    text = doc.page_content
+
+    packed = []
+    for start, end in _clause_spans(text):
+        if packed and end - packed[-1][0] <= max_chars:
+            packed[-1] = (packed[-1][0], end)
+        else:
+            packed.append((start, end))
+
+    chunks = []
+    for clause_start, clause_end in packed:
+        heading = text[clause_start:clause_end].strip().split("\n", 1)[0][:120]
+        for start, end in _window_spans(text, clause_start, clause_end, max_chars, overlap):
+            piece = text[start:end]
+            content = piece.strip()
+            if not content:
+                continue
+            start += len(piece) - len(piece.lstrip())
+            metadata = dict(doc.metadata, section=heading, start_index=start, end_index=start + len(content))
+            chunks.append(Document(page_content=content, metadata=metadata))
+    return chunks
+
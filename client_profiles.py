@@ -0,0 +1,136 @@
+"""
+Precomputed per-client contract style profiles
+
+The generation page used to ask the LLM to re-derive a client's style on every
+click. Profiles are now extracted once per client folder version and stored as
+JSON under ``client_profiles/``; run ``python client_profiles.py`` to build
+them offline.
+"""
+
+import os
+import re
+import json
+import tempfile
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from config import CLIENT_PROFILE_DIR
+from utils import folder_hash
+from response_cache import run_cached
+
+STYLE_PROMPT = (
+    "Analyze the client's contract style. Extract common clause types, writing tone, preferred keywords, "
+    "and jurisdiction references. Respond with only a JSON object with the keys \"clause_types\", \"tone\", "
+    "\"keywords\" and \"jurisdictions\"; every value is a list of short strings."
+)
+PROFILE_KEYS = ("clause_types", "tone", "keywords", "jurisdictions")
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="client-profile")
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def profile_path(client_name):
+    return os.path.join(CLIENT_PROFILE_DIR, f"{client_name}.json")
+
+
+def load_profile(client_name, content_hash):
+    """Return the stored profile, or None if missing or built from other files."""
+    path = profile_path(client_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    return profile if profile.get("content_hash") == content_hash else None
+
+
+def parse_profile(text):
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        data = {}
+    profile = {}
+    for key in PROFILE_KEYS:
+        value = data.get(key, [])
+        profile[key] = [value] if isinstance(value, str) else [str(v) for v in value]
+    if not any(profile.values()):
+        # Model ignored the format; keep its answer verbatim so generation still gets it
+        profile["summary"] = text.strip()
+    return profile
+
+
+def save_profile(client_name, profile):
+    os.makedirs(CLIENT_PROFILE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CLIENT_PROFILE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, profile_path(client_name))
+
+
+def build_profile(client_name, content_hash, qa_chain):
+    profile = parse_profile(run_cached(qa_chain, STYLE_PROMPT, None))
+    profile["client"] = client_name
+    profile["content_hash"] = content_hash
+    save_profile(client_name, profile)
+    return profile
+
+
+def ensure_profile(client_name, content_hash, qa_chain):
+    """Future resolving to the client's profile, building it in the background if needed.
+
+    Concurrent callers for the same client version share one build, which runs
+    in the first caller's context (so its LLM calls keep that caller's gateway priority).
+    """
+    key = (client_name, content_hash)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is None or (future.done() and future.exception() is not None):
+            profile = load_profile(client_name, content_hash)
+            if profile is not None:
+                future = _executor.submit(lambda: profile)
+            else:
+                future = _executor.submit(
+                    contextvars.copy_context().run, build_profile, client_name, content_hash, qa_chain
+                )
+            for stale in [k for k in _in_flight if k[0] == client_name and k != key]:
+                del _in_flight[stale]
+            _in_flight[key] = future
+        return future
+
+
+def format_profile(profile):
+    if profile.get("summary"):
+        return profile["summary"]
+    labels = {
+        "clause_types": "Common clause types",
+        "tone": "Writing tone",
+        "keywords": "Preferred keywords",
+        "jurisdictions": "Jurisdiction references",
+    }
+    return "\n".join(f"- {labels[key]}: {', '.join(profile[key])}" for key in PROFILE_KEYS if profile.get(key))
+
+
+if __name__ == "__main__":
+    import sys
+    from langchain.chains import RetrievalQA
+    from embedding_engine import BatchedEmbeddings
+    from resources import create_llm
+    from utils import load_or_build_client_index
+
+    llm = create_llm(streaming=False)
+    embedding = BatchedEmbeddings()
+    clients = sys.argv[1:] or sorted(os.listdir("client_metadata"))
+    for client_name in clients:
+        folder = os.path.join("client_metadata", client_name)
+        content_hash = folder_hash(folder)
+        if load_profile(client_name, content_hash) is not None:
+            print(f"✅ {client_name}: profile up to date")
+            continue
+        vectordb = load_or_build_client_index(folder, embedding, content_hash=content_hash)
+        if vectordb is None:
+            print(f"❌ {client_name}: no documents found")
+            continue
+        chain = RetrievalQA.from_chain_type(llm=llm, retriever=vectordb.as_retriever(search_kwargs={"k": 3}))
+        build_profile(client_name, content_hash, chain)
+        print(f"✅ {client_name}: profile built")
@@ -0,0 +1,93 @@
+"""
+Bounded LRU registry of per-client vector stores and RetrievalQA chains
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from utils import folder_hash, load_or_build_client_index
+
+logger = logging.getLogger("joels_angels.client_registry")
+
+
+def folder_signature(folder_path):
+    """Cheap stat-based fingerprint; the full content hash is only recomputed when it changes."""
+    return tuple(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+        for entry in sorted(os.scandir(folder_path), key=lambda e: e.name)
+        if entry.is_file()
+    )
+
+
+def estimate_bytes(vectordb):
+    vectors = vectordb.index.ntotal * vectordb.index.d * 4
+    # Texts in an SQLite docstore stay on disk
+    texts = sum(len(doc.page_content) for doc in getattr(vectordb.docstore, "_dict", {}).values())
+    return vectors + texts
+
+
+class _Entry:
+    def __init__(self, signature, content_hash, vectordb, chain, size):
+        self.signature = signature
+        self.content_hash = content_hash
+        self.vectordb = vectordb
+        self.chain = chain
+        self.size = size
+
+
+class ClientChainRegistry:
+    """Keeps recently used clients' indexes and chains in memory.
+
+    Entries are keyed by client folder and content hash, so an edited folder
+    is rebuilt; least recently used clients are evicted once the estimated
+    size of all entries exceeds ``max_bytes`` (the newest entry always stays).
+    """
+
+    def __init__(self, root, embedding_factory, chain_factory, max_bytes):
+        self.root = root
+        self.embedding_factory = embedding_factory
+        self.chain_factory = chain_factory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, client_name):
+        """Return ``(chain, content_hash)``; ``chain`` is None when the folder has no documents."""
+        folder = os.path.join(self.root, client_name)
+        signature = folder_signature(folder)
+        with self._lock:
+            entry = self._entries.get(client_name)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(client_name)
+                return entry.chain, entry.content_hash
+
+        content_hash = folder_hash(folder)
+        if entry is not None and entry.content_hash == content_hash:
+            # Touched but unchanged files
+            entry.signature = signature
+            return entry.chain, content_hash
+
+        vectordb = load_or_build_client_index(folder, self.embedding_factory(), content_hash=content_hash)
+        chain = self.chain_factory(vectordb) if vectordb is not None else None
+        size = estimate_bytes(vectordb) if vectordb is not None else 0
+        with self._lock:
+            self._entries[client_name] = _Entry(signature, content_hash, vectordb, chain, size)
+            self._entries.move_to_end(client_name)
+            self._evict()
+        return chain, content_hash
+
+    def _evict(self):
+        total = sum(entry.size for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            client_name, entry = self._entries.popitem(last=False)
+            total -= entry.size
+            logger.info("evicted client %s (%.1f MB)", client_name, entry.size / 2**20)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._entries),
+                "bytes": sum(entry.size for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
@@ -12,9 +12,18 @@ load_dotenv()
 APP_NAME = "Joel's Angels"
 APP_VERSION = "1.0.0"
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG_MODE else "INFO")
 
 # API Keys (for future AI integrations)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+
+# Azure OpenAI deployment
+AZURE_OPENAI_ENDPOINT = os.getenv(
+    "AZURE_OPENAI_ENDPOINT",
+    "https://openaiqc.gep.com/techathon/openai/deployments/gpt-4o-mini/chat/completions?api-version=2025-01-01-preview"
+)
+AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2025-01-01-preview")
+AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
 GOOGLE_TRANSLATE_API_KEY = os.getenv("GOOGLE_TRANSLATE_API_KEY", "")
 
 # Security Settings
@@ -25,6 +34,96 @@ ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", "default-encryption-key")
 UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB default
 
+# LLM gateway (quota of the Azure deployment)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RPM = int(os.getenv("LLM_RPM", "60"))  # requests per minute
+LLM_TPM = int(os.getenv("LLM_TPM", "60000"))  # tokens per minute
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # seconds
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "1500"))
+
+# Grammar checking (ACTQM Formality Score)
+LANGUAGETOOL_MAX_CONCURRENCY = int(os.getenv("LANGUAGETOOL_MAX_CONCURRENCY", "2"))
+LANGUAGETOOL_QUEUE_TIMEOUT = int(os.getenv("LANGUAGETOOL_QUEUE_TIMEOUT", "60"))  # seconds
+LANGUAGETOOL_HEALTH_INTERVAL = int(os.getenv("LANGUAGETOOL_HEALTH_INTERVAL", "300"))  # seconds
+
+# Document translation
+TRANSLATION_CHUNK_TOKENS = int(os.getenv("TRANSLATION_CHUNK_TOKENS", "1500"))
+TRANSLATION_MAX_WORKERS = int(os.getenv("TRANSLATION_MAX_WORKERS", "4"))
+
+# Sentence-transformers model used for every index
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", str(os.cpu_count() or 1)))  # 1 = no process pool
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch, onnx or onnx-int8
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("cache", "embeddings.sqlite"))  # empty = off
+
+# Optional backend worker service (worker_service.py); empty = run everything in-process
+WORKER_ADDRESS = os.getenv("WORKER_ADDRESS", "")  # host:port or Unix socket path
+WORKER_AUTHKEY = os.getenv("WORKER_AUTHKEY", "")  # required shared secret; no default
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 2)))
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", "300"))  # seconds
+
+# Contract template index (see index_factory.py): Flat, IVFPQ, HNSW or SQ8
+TEMPLATE_INDEX_TYPE = os.getenv("TEMPLATE_INDEX_TYPE", "Flat")
+INDEX_TRAIN_SAMPLE = int(os.getenv("INDEX_TRAIN_SAMPLE", "50000"))  # vectors used to train IVF/PQ/SQ
+INDEX_NLIST = int(os.getenv("INDEX_NLIST", "1024"))
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", "16"))
+INDEX_PQ_M = int(os.getenv("INDEX_PQ_M", "48"))  # sub-quantizers; must divide the embedding dimension
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+INDEX_HNSW_EF_SEARCH = int(os.getenv("INDEX_HNSW_EF_SEARCH", "64"))
+
+# Streaming ingestion (ingest.py)
+# Chunks embedded and indexed per batch; by default large enough for BatchedEmbeddings
+# to spread each batch over its process pool (see parallel_threshold)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", str(max(256, EMBEDDING_BATCH_SIZE * EMBEDDING_PROCESSES * 2))))
+INGEST_WINDOW_CHARS = int(os.getenv("INGEST_WINDOW_CHARS", str(256 * 1024)))  # characters read per file window
+
+# Contract template retrieval (BM25 + FAISS fused with RRF, optional cross-encoder rerank)
+TEMPLATE_RETRIEVAL_K = int(os.getenv("TEMPLATE_RETRIEVAL_K", "3"))
+RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))  # candidates per retriever before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty = off
+RERANK_BUDGET_MS = int(os.getenv("RERANK_BUDGET_MS", "300"))
+
+# Prompt context budgets (tokens)
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))  # retrieved documents per call
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.8"))  # shingle Jaccard
+STYLE_TOKEN_BUDGET = int(os.getenv("STYLE_TOKEN_BUDGET", "400"))
+PRIOR_OUTPUT_TOKEN_BUDGET = int(os.getenv("PRIOR_OUTPUT_TOKEN_BUDGET", "4000"))
+
+# LLM response cache
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join("cache", "responses.sqlite"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "False").lower() == "true"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.97"))
+
+# Session history (generated templates, translations, chat)
+HISTORY_PATH = os.getenv("HISTORY_PATH", os.path.join("cache", "history.sqlite"))
+HISTORY_TTL = int(os.getenv("HISTORY_TTL", str(30 * 24 * 3600)))  # seconds
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "5"))
+HISTORY_CHAT_WINDOW = int(os.getenv("HISTORY_CHAT_WINDOW", "20"))  # messages rendered at once
+
+# Resources built in the background at startup, comma separated
+# (llm, embeddings, templates, translation, cache); empty = fully lazy
+WARM_UP_RESOURCES = [name.strip() for name in os.getenv("WARM_UP_RESOURCES", "").split(",") if name.strip()]
+
+# In-memory budget for per-client indexes and chains
+CLIENT_CACHE_MAX_MB = int(os.getenv("CLIENT_CACHE_MAX_MB", "512"))
+
+# Clause chunking of client_metadata agreements before embedding
+CLIENT_CHUNK_CHARS = int(os.getenv("CLIENT_CHUNK_CHARS", "1200"))
+CLIENT_CHUNK_OVERLAP = int(os.getenv("CLIENT_CHUNK_OVERLAP", "150"))
+
+# Precomputed client style profiles
+CLIENT_PROFILE_DIR = os.getenv("CLIENT_PROFILE_DIR", "client_profiles")
+
+# Batch generation (batch_generate.py)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_RETRIES = int(os.getenv("BATCH_RETRIES", "2"))
+
 # Supported file types
 SUPPORTED_FILE_TYPES = {
     "pdf": "application/pdf",
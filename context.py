@@ -0,0 +1,113 @@
+"""
+Token-budgeted prompt context
+
+Counts tokens with the model's tokenizer (tiktoken), drops
+near-duplicate retrieved passages and trims context and prior outputs to a
+configured budget before they are stuffed into a prompt.
+"""
+
+import re
+import logging
+from langchain.docstore.document import Document
+from config import CONTEXT_TOKEN_BUDGET, CONTEXT_DUPLICATE_THRESHOLD, TOKENIZER_ENCODING
+
+logger = logging.getLogger("joels_angels.context")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+except Exception as e:  # tiktoken missing or encoding not available offline
+    logger.warning("tiktoken unavailable (%s); estimating token counts at ~4 characters per token", e)
+    _encoding = None
+
+TRIM_MARKER = "\n[…]\n"
+_WORD = re.compile(r"\w+")
+
+
+def count_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # ~4 characters per token is close enough for budgeting legal prose
+    return len(text) // 4 + 1
+
+
+def _truncate_tokens(text, max_tokens):
+    if max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return _encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def _shingles(text, size=5):
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def dedupe_documents(documents, threshold=CONTEXT_DUPLICATE_THRESHOLD):
+    """Drop passages whose word shingles mostly overlap an earlier (higher ranked) one."""
+    kept, kept_shingles = [], []
+    for doc in documents:
+        shingles = _shingles(doc.page_content)
+        duplicate = any(
+            len(shingles & other) / len(shingles | other) >= threshold
+            for other in kept_shingles if shingles | other
+        )
+        if not duplicate:
+            kept.append(doc)
+            kept_shingles.append(shingles)
+    return kept
+
+
+def fit_documents(documents, budget=CONTEXT_TOKEN_BUDGET):
+    """Keep retrieved documents in rank order until ``budget`` tokens are used.
+
+    The first document that doesn't fit is truncated rather than dropped when
+    a useful amount of room is left; everything after it is dropped.
+    """
+    remaining = budget
+    selected = []
+    for doc in dedupe_documents(documents):
+        tokens = count_tokens(doc.page_content)
+        if tokens <= remaining:
+            selected.append(doc)
+            remaining -= tokens
+            continue
+        if remaining >= 64:
+            selected.append(Document(
+                page_content=_truncate_tokens(doc.page_content, remaining),
+                metadata=dict(doc.metadata, truncated=True)
+            ))
+        break
+    if len(selected) < len(documents):
+        logger.debug("Context trimmed from %d to %d documents", len(documents), len(selected))
+    return selected
+
+
+def trim_text(text, budget):
+    """Fit ``text`` into ``budget`` tokens, keeping whole paragraphs from the start and the end."""
+    if count_tokens(text) <= budget:
+        return text
+    paragraphs = text.split("\n")
+    head, tail = [], []
+    remaining = budget - count_tokens(TRIM_MARKER)
+    # Alternate so both the opening and the closing clauses survive
+    lo, hi = 0, len(paragraphs) - 1
+    while lo <= hi:
+        paragraph = paragraphs[lo] if len(head) <= len(tail) else paragraphs[hi]
+        tokens = count_tokens(paragraph) + 1
+        if tokens > remaining:
+            break
+        remaining -= tokens
+        if len(head) <= len(tail):
+            head.append(paragraph)
+            lo += 1
+        else:
+            tail.insert(0, paragraph)
+            hi -= 1
+    if not head and not tail:
+        return _truncate_tokens(text, budget)
+    return "\n".join(head) + TRIM_MARKER + "\n".join(tail)
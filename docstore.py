@@ -0,0 +1,193 @@
+"""
+SQLite docstore and pickle-free FAISS persistence
+
+Chunk texts and metadata live in ``docstore.sqlite`` next to ``index.faiss``
+instead of a pickled ``index.pkl``. Loading an index opens the database and
+reads only the vector-position -> chunk-id map; documents are fetched by id
+when a search returns them.
+
+An index that is updated in place is written as a complete ``v-*`` version
+directory and published by atomically replacing the ``CURRENT`` pointer, so
+readers never see an index from one version next to a docstore from another.
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import faiss
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain.docstore.document import Document
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+# Written by FAISS.save_local; never loaded, removed once an index is rewritten
+LEGACY_DOCSTORE_FILE = "index.pkl"
+CURRENT_FILE = "CURRENT"
+VERSION_PREFIX = "v-"
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS positions (position INTEGER PRIMARY KEY, id TEXT NOT NULL);
+            """)
+            self._conn.commit()
+
+    def search(self, search):
+        with self._lock:
+            row = self._conn.execute("SELECT content, metadata FROM documents WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                ((id_, doc.page_content, json.dumps(doc.metadata)) for id_, doc in texts.items())
+            )
+            self._conn.commit()
+
+    def delete(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", ((id_,) for id_ in ids))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def iter_documents(self, batch_size=1000):
+        """``(id, Document)`` for every stored chunk, read in batches."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, content, metadata FROM documents WHERE id > ? ORDER BY id LIMIT ?", (last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for id_, content, metadata in rows:
+                yield id_, Document(page_content=content, metadata=json.loads(metadata))
+            last = rows[-1][0]
+
+    def load_positions(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT position, id FROM positions"))
+
+    def save_positions(self, index_to_docstore_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM positions")
+            self._conn.executemany("INSERT INTO positions VALUES (?, ?)", index_to_docstore_id.items())
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def iter_documents(docstore):
+    """``(id, Document)`` pairs from either an SQLite or an in-memory docstore."""
+    if isinstance(docstore, SQLiteDocstore):
+        return docstore.iter_documents()
+    return iter(docstore._dict.items())
+
+
+def current_path(persist_path):
+    """Directory holding the published version of ``persist_path``.
+
+    Without a ``CURRENT`` pointer the index files are read from ``persist_path``
+    itself, as for indexes that are only ever written once.
+    """
+    try:
+        with open(os.path.join(persist_path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return os.path.join(persist_path, f.read().strip())
+    except FileNotFoundError:
+        return persist_path
+
+
+def has_index(persist_path):
+    path = current_path(persist_path)
+    return all(os.path.exists(os.path.join(path, name)) for name in (INDEX_FILE, DOCSTORE_FILE))
+
+
+def new_version(persist_path):
+    os.makedirs(persist_path, exist_ok=True)
+    return tempfile.mkdtemp(dir=persist_path, prefix=VERSION_PREFIX)
+
+
+def publish_version(persist_path, version_path):
+    """Make ``version_path`` the current version, then remove every other one.
+
+    The pointer is swapped with one rename; a crash before it leaves the previous
+    version in place. Old versions still open elsewhere are removed on a later publish.
+    """
+    pointer = os.path.join(persist_path, CURRENT_FILE)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version_path))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer + ".tmp", pointer)
+    for entry in os.listdir(persist_path):
+        path = os.path.join(persist_path, entry)
+        if entry.startswith(VERSION_PREFIX) and path != version_path:
+            shutil.rmtree(path, ignore_errors=True)
+        elif entry in (INDEX_FILE, DOCSTORE_FILE, LEGACY_DOCSTORE_FILE):
+            # Unversioned files from older layouts
+            os.remove(path)
+
+
+def save_index(vectordb, persist_path):
+    """Write ``vectordb`` to ``persist_path`` as ``index.faiss`` + ``docstore.sqlite``.
+
+    A docstore that already lives at the target path is only updated with the
+    current positions; any other docstore is copied over in batches.
+    """
+    os.makedirs(persist_path, exist_ok=True)
+    target = os.path.join(persist_path, DOCSTORE_FILE)
+    docstore = vectordb.docstore
+    if not (isinstance(docstore, SQLiteDocstore) and os.path.abspath(docstore.path) == os.path.abspath(target)):
+        docstore = SQLiteDocstore(target)
+        batch = {}
+        for id_, doc in iter_documents(vectordb.docstore):
+            batch[id_] = doc
+            if len(batch) >= 1000:
+                docstore.add(batch)
+                batch = {}
+        docstore.add(batch)
+    docstore.save_positions(vectordb.index_to_docstore_id)
+    if docstore is not vectordb.docstore:
+        docstore.close()
+    faiss.write_index(vectordb.index, os.path.join(persist_path, INDEX_FILE))
+
+
+def load_index(persist_path, embedding, mmap=True, docstore_path=None):
+    """Open a saved index; the docstore is read-only unless ``docstore_path`` names a writable copy."""
+    persist_path = current_path(persist_path)
+    index_file = os.path.join(persist_path, INDEX_FILE)
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except (AttributeError, RuntimeError):
+            pass
+    if index is None:
+        index = faiss.read_index(index_file)
+    if docstore_path is None:
+        docstore = SQLiteDocstore(os.path.join(persist_path, DOCSTORE_FILE), read_only=True)
+    else:
+        docstore = SQLiteDocstore(docstore_path)
+    return FAISS(embedding, index, docstore, docstore.load_positions())
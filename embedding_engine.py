@@ -0,0 +1,156 @@
+"""
+Batched, cached sentence-transformers embeddings for index builds
+
+``BatchedEmbeddings`` is a drop-in replacement for ``HuggingFaceEmbeddings``:
+texts are deduplicated, looked up in an on-disk cache keyed by their hash,
+and only the misses are encoded, sorted by length so each batch pads to
+similar sizes. Large builds are spread over a multi-process pool on every
+core, and the model can run through ONNX Runtime (optionally int8-quantized).
+"""
+
+import os
+import atexit
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config import (
+    EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_PROCESSES, EMBEDDING_BACKEND, EMBEDDING_CACHE_PATH
+)
+
+logger = logging.getLogger("joels_angels.embeddings")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Quantized export shipped in the sentence-transformers model repos
+ONNX_INT8_FILE = "onnx/model_qint8_avx2.onnx"
+
+
+class EmbeddingCache:
+    """SQLite map from text hash to float32 vector."""
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?)",
+                ((key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items)
+            )
+            self._conn.commit()
+
+
+class BatchedEmbeddings(Embeddings):
+
+    def __init__(self, model_name=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE, processes=EMBEDDING_PROCESSES,
+                 backend=EMBEDDING_BACKEND, cache_path=EMBEDDING_CACHE_PATH):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.processes = processes
+        self.backend = backend
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self._model = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+        if self.backend != "torch":
+            try:
+                kwargs = {"file_name": ONNX_INT8_FILE} if self.backend == "onnx-int8" else {}
+                return SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=kwargs)
+            except Exception as e:
+                # Needs sentence-transformers>=3.2 with optimum[onnxruntime]
+                logger.warning("ONNX backend unavailable, using torch: %s", e)
+                self.backend = "torch"
+        return SentenceTransformer(self.model_name, device="cpu")
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._load_model()
+            return self._model
+
+    def _multi_process_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._model.start_multi_process_pool(["cpu"] * self.processes)
+                atexit.register(self.close)
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._model.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+    @property
+    def parallel_threshold(self):
+        """Fewest texts in one call that are worth sending to the process pool."""
+        return self.batch_size * self.processes * 2
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\x1f{self.backend}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _encode(self, texts):
+        # Longest first so every batch holds similar lengths and pads little
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        ordered = [texts[i] for i in order]
+        model = self.model
+        if self.processes > 1 and len(texts) >= self.parallel_threshold:
+            vectors = model.encode_multi_process(
+                ordered, self._multi_process_pool(), batch_size=self.batch_size,
+                chunk_size=max(self.batch_size, len(texts) // (self.processes * 4))
+            )
+        else:
+            vectors = model.encode(ordered, batch_size=self.batch_size, convert_to_numpy=True)
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Same preprocessing as HuggingFaceEmbeddings, so existing indexes stay compatible
+        texts = [text.replace("\n", " ") for text in texts]
+        if self.backend != "torch":
+            self.model  # settle a possible fallback to torch before it becomes part of the cache key
+        keys = [self._key(text) for text in texts]
+        found = self.cache.get_many(list(set(keys))) if self.cache else {}
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self._encode(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            if self.cache:
+                self.cache.put_many(computed.items())
+            found.update(computed)
+        logger.debug("Embedded %d texts (%d from cache)", len(texts), len(texts) - len(missing))
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text.replace("\n", " "), convert_to_numpy=True).tolist()
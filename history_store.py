@@ -0,0 +1,93 @@
+"""
+On-disk session history for the Streamlit pages
+
+Generated templates, translations and chat messages are written to SQLite
+instead of ``st.session_state``. Pages read back one window at a time: a page
+of previews for the feedback lists, the last few messages for the chat, and
+full bodies only when one is actually opened.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+PREVIEW_CHARS = 160
+
+
+@dataclass
+class HistoryEntry:
+    id: int
+    role: str
+    preview: str
+    created_at: float
+    body: str = None
+
+
+class HistoryStore:
+
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                role TEXT NOT NULL,
+                preview TEXT NOT NULL,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_session ON history (session_id, kind, role, id)")
+        self._conn.execute("DELETE FROM history WHERE created_at <= ?", (time.time() - self.ttl,))
+        self._conn.commit()
+
+    def append(self, session_id, kind, role, body):
+        preview = " ".join(body.split())[:PREVIEW_CHARS]
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO history (session_id, kind, role, preview, body, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, kind, role, preview, body, time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def count(self, session_id, kind, role=None):
+        query, params = "SELECT COUNT(*) FROM history WHERE session_id = ? AND kind = ?", [session_id, kind]
+        if role is not None:
+            query += " AND role = ?"
+            params.append(role)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def page(self, session_id, kind, role, page, page_size):
+        """Previews (no bodies) for one page of entries, newest first; ``page`` starts at 1."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, preview, created_at FROM history "
+                "WHERE session_id = ? AND kind = ? AND role = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (session_id, kind, role, page_size, (page - 1) * page_size)
+            ).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def recent(self, session_id, kind, limit):
+        """The last ``limit`` entries of any role with their bodies, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, preview, created_at, body FROM history "
+                "WHERE session_id = ? AND kind = ? ORDER BY id DESC LIMIT ?",
+                (session_id, kind, limit)
+            ).fetchall()
+        return [HistoryEntry(*row) for row in reversed(rows)]
+
+    def body(self, entry_id):
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,144 @@
+"""
+FAISS index factory for the contract template corpus
+
+``TEMPLATE_INDEX_TYPE`` picks the index: ``Flat`` (exact, the default),
+``IVFPQ`` (inverted lists + product quantization), ``HNSW`` (graph) or ``SQ8``
+(int8 scalar quantization). Trained types learn their centroids/codebooks on a
+random sample of the corpus. Run ``python index_factory.py`` to compare
+recall@k and query latency of every type on the current template vectors.
+"""
+
+import os
+import math
+import time
+import argparse
+import numpy as np
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from config import (
+    TEMPLATE_INDEX_TYPE, INDEX_TRAIN_SAMPLE, INDEX_NLIST, INDEX_NPROBE, INDEX_PQ_M, INDEX_HNSW_M, INDEX_HNSW_EF_SEARCH
+)
+
+INDEX_TYPES = ("Flat", "IVFPQ", "HNSW", "SQ8")
+
+# k-means wants ~39 training points per centroid
+_POINTS_PER_CENTROID = 39
+
+
+def factory_string(kind, dim, n_vectors):
+    """FAISS ``index_factory`` description for ``kind``, scaled down for small corpora."""
+    if kind == "Flat":
+        return "Flat"
+    if kind == "SQ8":
+        return "SQ8"
+    if kind == "HNSW":
+        return f"HNSW{INDEX_HNSW_M}"
+    if kind == "IVFPQ":
+        nlist = max(1, min(INDEX_NLIST, n_vectors // _POINTS_PER_CENTROID, int(4 * math.sqrt(n_vectors))))
+        nbits = min(8, int(math.log2(max(1, n_vectors // _POINTS_PER_CENTROID))))
+        if nbits < 4:
+            return "Flat"
+        m = max(d for d in range(1, min(INDEX_PQ_M, dim) + 1) if dim % d == 0)
+        return f"IVF{nlist},PQ{m}x{nbits}"
+    raise ValueError(f"Unknown index type {kind!r}; expected one of {INDEX_TYPES}")
+
+
+def configure_search(index):
+    """Apply query-time parameters, which aren't reliably persisted with the index."""
+    try:
+        faiss.extract_index_ivf(index).nprobe = INDEX_NPROBE
+    except (RuntimeError, TypeError):
+        pass
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = INDEX_HNSW_EF_SEARCH
+    return index
+
+
+def supports_remove(index):
+    """Whether ``FAISS.delete`` leaves the store consistent; callers rebuild otherwise.
+
+    LangChain renumbers the remaining vectors after a delete, as flat indexes do.
+    IVF indexes keep their old ids and graph indexes can't drop vectors at all.
+    """
+    if hasattr(index, "hnsw"):
+        return False
+    try:
+        faiss.extract_index_ivf(index)
+    except (RuntimeError, TypeError):
+        return True
+    return False
+
+
+def create_index(kind, vectors, train_sample=INDEX_TRAIN_SAMPLE):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.index_factory(vectors.shape[1], factory_string(kind, vectors.shape[1], len(vectors)))
+    if not index.is_trained:
+        sample = vectors
+        if len(vectors) > train_sample:
+            rows = np.random.default_rng(0).choice(len(vectors), train_sample, replace=False)
+            sample = vectors[rows]
+        index.train(sample)
+    index.add(vectors)
+    return configure_search(index)
+
+
+def build_faiss_store(documents, embedding, kind=TEMPLATE_INDEX_TYPE, ids=None, docstore=None):
+    """``FAISS.from_documents`` with a configurable index type and docstore."""
+    vectors = np.array(embedding.embed_documents([doc.page_content for doc in documents]), dtype=np.float32)
+    ids = list(ids) if ids is not None else [str(i) for i in range(len(documents))]
+    index = create_index(kind, vectors)
+    docstore = docstore if docstore is not None else InMemoryDocstore()
+    docstore.add(dict(zip(ids, documents)))
+    return FAISS(embedding, index, docstore, dict(enumerate(ids)))
+
+
+def benchmark(vectors, kinds=INDEX_TYPES, k=5, n_queries=200):
+    """Recall@k against exact search, mean query latency and serialized size per index type."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)]
+    queries = queries + rng.normal(scale=0.01, size=queries.shape).astype(np.float32)
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    results = []
+    for kind in kinds:
+        started = time.perf_counter()
+        index = create_index(kind, vectors)
+        build_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query[None, :], k)
+        latency_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        _, found = index.search(queries, k)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        results.append({
+            "type": kind,
+            "factory": factory_string(kind, vectors.shape[1], len(vectors)),
+            f"recall@{k}": round(float(recall), 3),
+            "latency_ms": round(latency_ms, 3),
+            "build_s": round(build_s, 2),
+            "size_mb": round(faiss.serialize_index(index).nbytes / 2**20, 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FAISS index types on the template vectors.")
+    parser.add_argument("--index", default="embeddings", help="saved FAISS index to take vectors from")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    from docstore import INDEX_FILE, current_path
+    index = faiss.read_index(os.path.join(current_path(args.index), INDEX_FILE))
+    vectors = index.reconstruct_n(0, index.ntotal)
+    print(f"📊 {index.ntotal} vectors of dimension {index.d}")
+    for row in benchmark(vectors, k=args.k, n_queries=args.queries):
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
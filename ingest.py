@@ -0,0 +1,100 @@
+"""
+Streaming ingestion for the template and client indexes
+
+Folders are walked lazily in sorted order, files are read in windows that end
+on paragraph breaks, and chunks are embedded and added to the index in
+bounded batches, so memory use doesn't grow with the size of a document dump.
+"""
+
+import os
+import uuid
+from itertools import islice
+from langchain.docstore.document import Document
+from index_factory import build_faiss_store
+from config import INGEST_BATCH_SIZE, INGEST_WINDOW_CHARS, INDEX_TRAIN_SAMPLE, TEMPLATE_INDEX_TYPE
+
+READ_BLOCK_CHARS = 1 << 20
+
+
+def iter_files(folder_path, suffixes=(".txt",), recursive=False):
+    """Relative paths of matching files, in sorted order, without listing whole trees up front."""
+    def walk(relative):
+        with os.scandir(os.path.join(folder_path, relative)) as entries:
+            entries = sorted((e for e in entries if not e.name.startswith(".")), key=lambda e: e.name)
+        for entry in entries:
+            path = os.path.join(relative, entry.name) if relative else entry.name
+            if entry.is_dir():
+                if recursive:
+                    yield from walk(path)
+            elif entry.name.endswith(suffixes):
+                yield path
+    yield from walk("")
+
+
+def _break_point(buffer, limit):
+    for separator in ("\n\n", "\n"):
+        cut = buffer.rfind(separator, 0, limit)
+        if cut > 0:
+            return cut + len(separator)
+    return limit
+
+
+def iter_text_windows(path, window_chars=INGEST_WINDOW_CHARS):
+    """``(offset, text)`` pieces of a file of about ``window_chars``, cut at paragraph breaks."""
+    offset, buffer = 0, ""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        for block in iter(lambda: file.read(READ_BLOCK_CHARS), ""):
+            buffer += block
+            while len(buffer) > window_chars:
+                cut = _break_point(buffer, window_chars)
+                yield offset, buffer[:cut]
+                offset += cut
+                buffer = buffer[cut:]
+    if buffer:
+        yield offset, buffer
+
+
+def iter_file_chunks(path, split, metadata):
+    """Chunks of one file via ``split(Document) -> [Document]``, applied window by window.
+
+    ``start_index``/``end_index`` set by the splitter are shifted to file offsets.
+    """
+    for offset, text in iter_text_windows(path):
+        for chunk in split(Document(page_content=text, metadata=dict(metadata))):
+            for key in ("start_index", "end_index"):
+                if key in chunk.metadata:
+                    chunk.metadata[key] += offset
+            yield chunk
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def add_to_index(vectordb, chunks, embedding, index_type=TEMPLATE_INDEX_TYPE, batch_size=INGEST_BATCH_SIZE,
+                 docstore=None):
+    """Embed ``(id, Document)`` pairs batch by batch into ``vectordb``, creating it if None.
+
+    A new store keeps its documents in ``docstore`` (in memory when not given).
+
+    A new index of a trained type learns from the first ``INDEX_TRAIN_SAMPLE``
+    chunks rather than the whole stream.
+    """
+    chunks = iter(chunks)
+    if vectordb is None:
+        first = list(islice(chunks, batch_size if index_type in ("Flat", "HNSW") else max(batch_size, INDEX_TRAIN_SAMPLE)))
+        if not first:
+            return None
+        ids, docs = zip(*first)
+        vectordb = build_faiss_store(list(docs), embedding, index_type, ids=ids, docstore=docstore)
+    for batch in batched(chunks, batch_size):
+        ids, docs = zip(*batch)
+        vectordb.add_documents(list(docs), ids=list(ids))
+    return vectordb
+
+
+def with_random_ids(docs):
+    for doc in docs:
+        yield uuid.uuid4().hex, doc
@@ -0,0 +1,285 @@
+"""
+Async gateway for all Azure OpenAI calls
+
+Every completion in the process goes through one ``LLMGateway``: an asyncio
+loop on a background thread with a pooled HTTP client, token buckets sized to
+the deployment's RPM/TPM quota, jittered retries on 429/5xx, and a priority
+queue that favours interactive sessions over batch work and spreads capacity
+fairly between sessions. ``GatewayChatModel`` exposes it to LangChain so the
+existing RetrievalQA chains keep working unchanged.
+"""
+
+import queue
+import random
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, List, Optional
+import httpx
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_community.adapters.openai import convert_message_to_dict
+from config import (
+    OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION,
+    LLM_MAX_CONCURRENCY, LLM_RPM, LLM_TPM, LLM_MAX_RETRIES, LLM_TIMEOUT, LLM_EXPECTED_COMPLETION_TOKENS
+)
+
+logger = logging.getLogger("joels_angels.llm_gateway")
+
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = 10
+
+# Failures worth retrying: rate limits, timeouts (APITimeoutError is an APIConnectionError),
+# dropped connections and 5xx responses
+TRANSIENT_ERRORS = (
+    openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError, TimeoutError, ConnectionError
+)
+
+_request_context = contextvars.ContextVar("llm_request_context", default=("default", INTERACTIVE_PRIORITY))
+
+
+@contextmanager
+def request_context(session_id, priority=INTERACTIVE_PRIORITY):
+    """Tag LLM calls made inside the block with a session and priority (lower runs first)."""
+    token = _request_context.set((session_id, priority))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``per_minute`` / 60 per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        if self._updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                self._refill(loop.time())
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount):
+        """Correct an earlier estimate once the real usage is known (may go negative)."""
+        self.tokens -= amount
+
+
+class _Request:
+    def __init__(self, messages, params, stream, session_id):
+        self.messages = messages
+        self.params = params
+        self.stream = stream
+        self.session_id = session_id
+        self.events = queue.Queue()
+
+
+class LLMGateway:
+
+    def __init__(self, deployment, max_concurrency=LLM_MAX_CONCURRENCY, rpm=LLM_RPM, tpm=LLM_TPM,
+                 max_retries=LLM_MAX_RETRIES, timeout=LLM_TIMEOUT):
+        self.deployment = deployment
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._rpm = rpm
+        self._tpm = tpm
+        self._sequence = itertools.count()
+        self._queued_per_session = defaultdict(int)
+        # Created up front so bad credentials fail here rather than on the loop thread
+        self._client = openai.AsyncAzureOpenAI(
+            api_key=OPENAI_API_KEY,
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_version=AZURE_OPENAI_API_VERSION,
+            azure_deployment=self.deployment,
+            max_retries=0,  # retries are scheduled here so they respect the buckets
+            timeout=self.timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                timeout=self.timeout
+            )
+        )
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.PriorityQueue()
+        self._requests_bucket = TokenBucket(self._rpm)
+        self._tokens_bucket = TokenBucket(self._tpm)
+        for _ in range(self.max_concurrency):
+            self._loop.create_task(self._worker())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _submit(self, messages, params, stream):
+        session_id, priority = _request_context.get()
+        request = _Request(messages, params, stream, session_id)
+
+        def enqueue():
+            # Sessions with more work already queued sort behind lighter ones at the same priority
+            backlog = self._queued_per_session[session_id]
+            self._queued_per_session[session_id] += 1
+            self._queue.put_nowait((priority, backlog, next(self._sequence), request))
+
+        self._loop.call_soon_threadsafe(enqueue)
+        return request
+
+    async def _worker(self):
+        while True:
+            _, _, _, request = await self._queue.get()
+            try:
+                await self._execute(request)
+            except Exception as e:
+                request.events.put(("error", e))
+            finally:
+                self._queued_per_session[request.session_id] -= 1
+                if not self._queued_per_session[request.session_id]:
+                    del self._queued_per_session[request.session_id]
+                self._queue.task_done()
+
+    async def _execute(self, request):
+        estimate = sum(estimate_tokens(str(m.get("content") or "")) for m in request.messages)
+        estimate += request.params.get("max_tokens") or LLM_EXPECTED_COMPLETION_TOKENS
+        for attempt in range(self.max_retries + 1):
+            await self._requests_bucket.acquire(1)
+            await self._tokens_bucket.acquire(estimate)
+            emitted = False
+            try:
+                if request.stream:
+                    parts = []
+                    stream = await self._client.chat.completions.create(
+                        model=self.deployment, messages=request.messages, stream=True, **request.params
+                    )
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            emitted = True
+                            parts.append(delta)
+                            request.events.put(("token", delta))
+                    request.events.put(("done", "".join(parts)))
+                else:
+                    response = await self._client.chat.completions.create(
+                        model=self.deployment, messages=request.messages, **request.params
+                    )
+                    if response.usage is not None:
+                        self._tokens_bucket.adjust(response.usage.total_tokens - estimate)
+                    request.events.put(("done", response.choices[0].message.content or ""))
+                return
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                # A half-streamed answer can't be replayed without duplicating tokens
+                if emitted or attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning("LLM call failed (%s), retry %d in %.1fs", type(e).__name__, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error, attempt):
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000 + random.uniform(0, 0.5)
+            if "retry-after" in headers:
+                return float(headers["retry-after"]) + random.uniform(0, 0.5)
+        except ValueError:
+            pass
+        # Full jitter exponential backoff
+        return random.uniform(0, min(60.0, 2.0 ** (attempt + 1)))
+
+    def stream(self, messages, **params):
+        """Yield completion tokens on the calling thread as they arrive."""
+        request = self._submit(messages, params, stream=True)
+        while True:
+            kind, payload = request.events.get()
+            if kind == "token":
+                yield payload
+            elif kind == "done":
+                return
+            else:
+                raise payload
+
+    def complete(self, messages, **params):
+        request = self._submit(messages, params, stream=False)
+        kind, payload = request.events.get()
+        if kind == "error":
+            raise payload
+        return payload
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(deployment):
+    with _gateways_lock:
+        if deployment not in _gateways:
+            _gateways[deployment] = LLMGateway(deployment)
+        return _gateways[deployment]
+
+
+class GatewayChatModel(BaseChatModel):
+    """LangChain chat model that sends every call through the shared ``LLMGateway``."""
+
+    deployment_name: str
+    temperature: float = 0.3
+    max_tokens: Optional[int] = None
+    streaming: bool = False
+
+    @property
+    def _llm_type(self):
+        return "azure-openai-gateway"
+
+    @property
+    def _identifying_params(self):
+        return {"deployment_name": self.deployment_name, "temperature": self.temperature}
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs):
+        params = {"temperature": self.temperature}
+        if self.max_tokens:
+            params["max_tokens"] = self.max_tokens
+        if stop:
+            params["stop"] = stop
+        params.update(kwargs)
+        payload = [convert_message_to_dict(m) for m in messages]
+        gateway = get_gateway(self.deployment_name)
+        if self.streaming:
+            parts = []
+            for token in gateway.stream(payload, **params):
+                parts.append(token)
+                if run_manager:
+                    run_manager.on_llm_new_token(token)
+            text = "".join(parts)
+        else:
+            text = gateway.complete(payload, **params)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
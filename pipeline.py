@@ -0,0 +1,112 @@
+"""
+Contract generation pipeline shared by the Streamlit page and batch runs
+"""
+
+from langsmith import traceable
+from config import STYLE_TOKEN_BUDGET, PRIOR_OUTPUT_TOKEN_BUDGET
+from context import trim_text
+from client_profiles import ensure_profile, format_profile
+from resources import CLIENT_METADATA_PATH, get_llm, get_qa_chain, get_client_registry, get_response_cache
+from response_cache import run_cached
+from revision import revise, split_parts
+from worker_service import get_worker
+
+CONTRACT_TYPES = {
+    "NDA": "Non-Disclosure Agreement",
+    "MSA": "Master Services Agreement",
+    "Employment": "Employment Agreement",
+    "Sponsorship": "Sponsorship Agreement",
+}
+
+
+def resolve_contract_type(category):
+    """Accept either a short category ("NDA") or a full contract type."""
+    return CONTRACT_TYPES.get(category.strip(), category.strip())
+
+
+def get_client_chain(client_name):
+    """RetrievalQA over a client's documents (None if the folder has none) and the folder's content hash."""
+    return get_client_registry().get(client_name)
+
+
+def build_generation_query(contract_type, style, contract_value, jurisdiction, governing_law, effective_date):
+    style = trim_text(style, STYLE_TOKEN_BUDGET)
+    return f"Create a detailed contract template for {contract_type}.Make sure that the generated template is based on {style}. Make sure it is formal, general-purpose, and does not include any party names.Value of the contract is {contract_value}. Jurisdiction is {jurisdiction}. Governing law is {governing_law}. Effective date is {effective_date}."
+
+
+def build_revision_query(previous_output, feedback):
+    return f"Make the changes to: {previous_output} based on the feedback: {feedback}"
+
+
+def build_revision_queries(previous_output, feedback):
+    """Full-regeneration queries for a revision, one per part of ``previous_output``.
+
+    The document being revised is never trimmed: one longer than
+    ``PRIOR_OUTPUT_TOKEN_BUDGET`` is split at section boundaries and each part
+    is regenerated on its own.
+    """
+    parts = split_parts(previous_output, PRIOR_OUTPUT_TOKEN_BUDGET)
+    if len(parts) == 1:
+        return [build_revision_query(previous_output, feedback)]
+    return [
+        f"This is part {i} of {len(parts)} of a longer document. Apply the feedback only where it concerns "
+        f"this part and return the whole part, revised, with nothing left out. "
+        + build_revision_query(part, feedback)
+        for i, part in enumerate(parts, start=1)
+    ]
+
+
+def run_revision(run, previous_output, feedback):
+    """Regenerate ``previous_output`` with ``run(query) -> str``, part by part when it is long."""
+    return "\n\n".join(run(query).strip() for query in build_revision_queries(previous_output, feedback))
+
+
+def generation_fields(contract_type, contract_value, jurisdiction, governing_law, effective_date):
+    """Fields a cached contract must match exactly before a similar prompt may reuse it."""
+    return {
+        "contract_type": str(contract_type),
+        "contract_value": str(contract_value),
+        "jurisdiction": str(jurisdiction),
+        "governing_law": str(governing_law),
+        "effective_date": str(effective_date),
+    }
+
+
+@traceable(name="generate_contract_template_interaction")
+def generate_contract_template(query, callbacks=None, fields=None):
+    return run_cached(get_qa_chain(), query, get_response_cache(), callbacks=callbacks, fields=fields)
+
+
+def revise_contract(previous_output, feedback, callbacks=None):
+    """Apply feedback to a generated template as section edits, regenerating only as a fallback."""
+    return revise(
+        previous_output, feedback, get_llm(),
+        lambda callbacks: run_revision(
+            lambda query: generate_contract_template(query, callbacks=callbacks), previous_output, feedback
+        ),
+        callbacks=callbacks
+    )
+
+
+def generate_contract(client_name, contract_type, jurisdiction, governing_law, contract_value, effective_date,
+                      callbacks=None, progress=None, score=True):
+    """Run client style lookup, generation and (optionally) ACTQM scoring for one contract.
+
+    Returns a dict with the generation ``query``, the contract ``text`` and its
+    ACTQM ``metrics`` (None when ``score`` is False).
+    """
+    chain, content_hash = get_client_chain(client_name)
+    if chain is None:
+        raise ValueError(f"No documents found in '{CLIENT_METADATA_PATH}/{client_name}'")
+    if progress is not None:
+        progress.start("client_style")
+    style = format_profile(ensure_profile(client_name, content_hash, chain).result())
+    query = build_generation_query(contract_type, style, contract_value, jurisdiction, governing_law, effective_date)
+    fields = generation_fields(contract_type, contract_value, jurisdiction, governing_law, effective_date)
+    text = generate_contract_template(query, callbacks=callbacks, fields=fields)
+    metrics = None
+    if score:
+        if progress is not None:
+            progress.start("scoring")
+        metrics = get_worker().score_contract(text, contract_type.strip())
+    return {"query": query, "text": text, "metrics": metrics}
@@ -0,0 +1,105 @@
+"""
+Stage-based progress reporting for the generation and translation pipelines
+"""
+
+import time
+import logging
+from langchain.callbacks.base import BaseCallbackHandler
+
+logger = logging.getLogger("joels_angels.progress")
+
+GENERATION_STAGES = [
+    ("client_style", "Analyzing client contract style...", 2),
+    ("retrieval", "Retrieving template clauses...", 1),
+    ("generation", "Drafting contract...", 6),
+    ("scoring", "Scoring with ACTQM...", 2),
+]
+
+TRANSLATION_STAGES = [
+    ("parse", "Reading document...", 1),
+    ("translation", "Translating...", 12),
+    ("docx", "Building DOCX...", 1),
+]
+
+
+class ProgressReporter:
+    """Moves a progress bar and status line as real pipeline stages start.
+
+    ``stages`` is a list of ``(key, label, weight)``; the bar advances by each
+    stage's weight when it completes. Stage durations are kept in ``timings``
+    and logged so slow stages show up in the server logs.
+    """
+
+    def __init__(self, stages, progress_bar=None, status_text=None, pipeline="pipeline"):
+        self.stages = {key: (label, weight) for key, label, weight in stages}
+        self.total_weight = sum(weight for _, _, weight in stages) or 1
+        self.progress_bar = progress_bar
+        self.status_text = status_text
+        self.pipeline = pipeline
+        self.timings = {}
+        self._done_weight = 0
+        self._current = None
+        self._started_at = None
+        self._pipeline_start = time.perf_counter()
+
+    def _render(self, fraction_of_current=0.0):
+        weight = self.stages[self._current][1] if self._current else 0
+        done = self._done_weight + weight * min(max(fraction_of_current, 0.0), 1.0)
+        if self.progress_bar is not None:
+            self.progress_bar.progress(min(int(100 * done / self.total_weight), 100))
+
+    def _end_current(self):
+        if self._current is None:
+            return
+        elapsed = time.perf_counter() - self._started_at
+        self.timings[self._current] = self.timings.get(self._current, 0.0) + elapsed
+        self._done_weight += self.stages[self._current][1]
+        logger.info("%s: stage %s took %.2fs", self.pipeline, self._current, elapsed)
+        self._current = None
+
+    def start(self, key):
+        """Mark ``key`` as the running stage, completing the previous one."""
+        if key == self._current:
+            return
+        self._end_current()
+        self._current = key
+        self._started_at = time.perf_counter()
+        if self.status_text is not None:
+            self.status_text.text(self.stages[key][0])
+        self._render()
+
+    def advance(self, fraction):
+        """Report progress inside the running stage (0.0 - 1.0)."""
+        self._render(fraction)
+
+    def finish(self):
+        self._end_current()
+        total = time.perf_counter() - self._pipeline_start
+        logger.info("%s: finished in %.2fs (%s)", self.pipeline, total,
+                    ", ".join(f"{k}={v:.2f}s" for k, v in self.timings.items()))
+        if self.progress_bar is not None:
+            self.progress_bar.progress(100)
+        if self.status_text is not None:
+            self.status_text.text(f"Done in {total:.1f}s")
+        return self.timings
+
+    def summary(self):
+        return " · ".join(f"{self.stages[k][0].rstrip('.')} {v:.1f}s" for k, v in self.timings.items())
+
+
+class ProgressCallback(BaseCallbackHandler):
+    """Turns LangChain retriever/LLM events into ``ProgressReporter`` stages."""
+
+    def __init__(self, reporter, retrieval_stage="retrieval", llm_stage="generation"):
+        self.reporter = reporter
+        self.retrieval_stage = retrieval_stage
+        self.llm_stage = llm_stage
+
+    def on_retriever_start(self, serialized, query, **kwargs):
+        self.reporter.start(self.retrieval_stage)
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.reporter.start(self.llm_stage)
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.reporter.start(self.llm_stage)
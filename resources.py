@@ -0,0 +1,168 @@
+"""
+Lazily created, process-wide models, indexes and chains
+
+Nothing here runs at import time: each resource is built the first time a page
+asks for it and then shared by every session through ``st.cache_resource``.
+"""
+
+import logging
+import threading
+import streamlit as st
+from langchain.chains import RetrievalQA
+from config import (
+    AZURE_OPENAI_DEPLOYMENT, WORKER_ADDRESS, TEMPLATE_RETRIEVAL_K,
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_SEMANTIC,
+    RESPONSE_CACHE_SIMILARITY, WARM_UP_RESOURCES, CLIENT_CACHE_MAX_MB, HISTORY_PATH, HISTORY_TTL
+)
+from llm_gateway import GatewayChatModel
+from embedding_engine import BatchedEmbeddings
+from response_cache import ResponseCache
+from history_store import HistoryStore
+from retrievers import LanguagePartitionedRetriever, build_template_retriever, load_reranker
+from client_registry import ClientChainRegistry
+from worker_service import WorkerEmbeddings, WorkerTemplateRetriever
+from utils import update_vector_store, load_or_build_reference_indexes
+
+logger = logging.getLogger("joels_angels.resources")
+
+EMBED_PATH = "embeddings"
+TEMPLATES_PATH = "contract_templates"
+REFERENCE_DOCS_PATH = "reference_docs"
+CLIENT_METADATA_PATH = "client_metadata"
+
+
+# Calls are scheduled by the process-wide LLM gateway (pooling, rate limits, retries)
+def create_llm(streaming=True):
+    return GatewayChatModel(
+        deployment_name=AZURE_OPENAI_DEPLOYMENT,
+        temperature=0.3,
+        streaming=streaming
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm():
+    return create_llm()
+
+
+# One MiniLM instance for every index in the process, or the worker service's when configured
+@st.cache_resource(show_spinner="Loading embedding model...")
+def get_embeddings():
+    if WORKER_ADDRESS:
+        return WorkerEmbeddings()
+    return BatchedEmbeddings()
+
+
+# Only new or changed templates are embedded; see utils.update_vector_store
+@st.cache_resource(show_spinner="🔄 Loading contract template index...")
+def get_template_vectordb():
+    vectordb = update_vector_store(TEMPLATES_PATH, EMBED_PATH, get_embeddings())
+    if vectordb is None:
+        raise ValueError(f"No .txt contract templates found in '{TEMPLATES_PATH}'")
+    return vectordb
+
+
+@st.cache_resource(show_spinner="Loading reranker...")
+def get_reranker():
+    return load_reranker()
+
+
+@st.cache_resource(show_spinner=False)
+def get_qa_chain():
+    # The worker service keeps the template index up to date and searches it itself
+    if WORKER_ADDRESS:
+        retriever = WorkerTemplateRetriever(k=TEMPLATE_RETRIEVAL_K)
+    else:
+        retriever = build_template_retriever(get_template_vectordb(), TEMPLATE_RETRIEVAL_K, get_reranker())
+    return RetrievalQA.from_chain_type(
+        llm=get_llm(),
+        retriever=retriever,
+        return_source_documents=False
+    )
+
+
+# One persisted index per language under embeddings/reference/<language>/<hash>,
+# so replicas embed reference_docs only once and searches skip other languages
+@st.cache_resource(show_spinner="🔄 Loading translation references...")
+def get_reference_partitions():
+    return load_or_build_reference_indexes(get_embeddings(), REFERENCE_DOCS_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def get_translation_chain(source_lang, target_lang):
+    retriever = LanguagePartitionedRetriever(
+        partitions=get_reference_partitions(),
+        languages=[source_lang, target_lang],
+        embedding=get_embeddings()
+    )
+    return RetrievalQA.from_chain_type(
+        llm=get_llm(),
+        retriever=retriever,
+        return_source_documents=False
+    )
+
+
+def _client_chain(vectordb):
+    return RetrievalQA.from_chain_type(
+        llm=get_llm(),
+        retriever=vectordb.as_retriever(search_kwargs={"k": 3})
+    )
+
+
+# Per-client indexes and chains, reused across reruns and bounded by CLIENT_CACHE_MAX_MB
+@st.cache_resource(show_spinner=False)
+def get_client_registry():
+    return ClientChainRegistry(
+        CLIENT_METADATA_PATH, get_embeddings, _client_chain, max_bytes=CLIENT_CACHE_MAX_MB * 2**20
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    return ResponseCache(
+        RESPONSE_CACHE_PATH,
+        ttl=RESPONSE_CACHE_TTL,
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        embedding=get_embeddings() if RESPONSE_CACHE_SEMANTIC else None,
+        similarity_threshold=RESPONSE_CACHE_SIMILARITY
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store():
+    return HistoryStore(HISTORY_PATH, ttl=HISTORY_TTL)
+
+
+WARM_UP_TARGETS = {
+    "llm": get_llm,
+    "embeddings": get_embeddings,
+    "templates": get_qa_chain,
+    "translation": get_reference_partitions,
+    "cache": get_response_cache,
+}
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+
+def warm_up(names=WARM_UP_RESOURCES):
+    """Build the named resources on a background thread, once per process.
+
+    Lets a restarted replica load indexes before its first user arrives while
+    the Home page renders straight away.
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started or not names:
+            return
+        _warm_up_started = True
+
+    def run():
+        for name in names:
+            try:
+                WARM_UP_TARGETS[name]()
+                logger.info("warmed up %s", name)
+            except Exception:
+                logger.exception("warm-up of %s failed", name)
+
+    threading.Thread(target=run, name="resource-warm-up", daemon=True).start()
@@ -0,0 +1,186 @@
+"""
+Persistent response cache for the RetrievalQA chains
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+from context import fit_documents
+
+logger = logging.getLogger("joels_angels.cache")
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def context_hash(documents):
+    return _sha256("\x1e".join(doc.page_content for doc in documents))
+
+
+def chain_params(chain):
+    """Model parameters that change the answer for the same prompt and context."""
+    llm = chain.combine_documents_chain.llm_chain.llm
+    return {
+        "model": getattr(llm, "deployment_name", None) or getattr(llm, "model_name", None),
+        "temperature": getattr(llm, "temperature", None),
+    }
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with TTL and LRU eviction.
+
+    Entries are keyed on prompt, retrieved-context hash and model parameters.
+    When an ``embedding`` is supplied and a lookup asks for it (``semantic``),
+    misses fall back to the most similar cached prompt with the same parameters
+    and retrieved context if its cosine similarity reaches ``similarity_threshold``.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000, embedding=None,
+                 similarity_threshold=0.97, semantic_candidates=2000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embedding = embedding
+        self.similarity_threshold = similarity_threshold
+        self.semantic_candidates = semantic_candidates
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                params_hash TEXT NOT NULL,
+                ctx_hash TEXT,
+                prompt TEXT NOT NULL,
+                response TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "ctx_hash" not in columns:
+            # Older caches; their rows keep exact hits but never match semantically
+            self._conn.execute("ALTER TABLE responses ADD COLUMN ctx_hash TEXT")
+        self._conn.execute("DROP INDEX IF EXISTS responses_params")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_context ON responses (params_hash, ctx_hash, last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _keys(prompt, ctx_hash, params):
+        params_hash = _sha256(json.dumps(params, sort_keys=True))
+        return _sha256(f"{params_hash}\x1f{ctx_hash}\x1f{prompt}"), params_hash
+
+    def _embed(self, prompt):
+        vector = np.asarray(self.embedding.embed_query(prompt), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(self, prompt, ctx_hash, params, semantic=False):
+        key, params_hash = self._keys(prompt, ctx_hash, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits["exact"] += 1
+                self._log("exact hit")
+                return row[0]
+
+        if semantic and self.embedding is not None:
+            query = self._embed(prompt)
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, response, embedding FROM responses "
+                    "WHERE params_hash = ? AND ctx_hash = ? AND created_at > ? AND embedding IS NOT NULL "
+                    "ORDER BY last_used DESC LIMIT ?",
+                    (params_hash, ctx_hash, now - self.ttl, self.semantic_candidates)
+                ).fetchall()
+                if rows:
+                    matrix = np.frombuffer(b"".join(r[2] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+                    scores = matrix @ query
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, rows[best][0]))
+                        self._conn.commit()
+                        self.hits["semantic"] += 1
+                        self._log(f"semantic hit (similarity {scores[best]:.3f})")
+                        return rows[best][1]
+
+        with self._lock:
+            self.misses += 1
+        self._log("miss")
+        return None
+
+    def put(self, prompt, ctx_hash, params, response, semantic=False):
+        key, params_hash = self._keys(prompt, ctx_hash, params)
+        vector = self._embed(prompt).tobytes() if semantic and self.embedding is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, params_hash, ctx_hash, prompt, response, embedding, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, params_hash, ctx_hash, prompt, response, vector, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def stats(self):
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            "exact_hits": self.hits["exact"],
+            "semantic_hits": self.hits["semantic"],
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+    def _log(self, outcome):
+        logger.info("response cache %s; %s", outcome, self.stats())
+
+
+def run_cached(chain, query, cache, callbacks=None, fields=None):
+    """``chain.run(query)`` for a RetrievalQA chain, answered from ``cache`` when possible.
+
+    Retrieved documents are deduplicated and trimmed to the context token
+    budget first. Retrieval always runs (the context hash is part of the key);
+    only the LLM call is skipped on a hit. Similar-prompt (semantic) hits are
+    only allowed when the caller passes the request's structured ``fields``,
+    and then only among entries whose fields match exactly.
+    """
+    documents = chain.retriever.get_relevant_documents(query, callbacks=callbacks)
+    documents = fit_documents(documents)
+    if cache is None:
+        return chain.combine_documents_chain.run(input_documents=documents, question=query, callbacks=callbacks)
+    ctx_hash = context_hash(documents)
+    params = chain_params(chain)
+    semantic = fields is not None
+    if semantic:
+        params["fields"] = fields
+    cached = cache.get(query, ctx_hash, params, semantic=semantic)
+    if cached is not None:
+        return cached
+    result = chain.combine_documents_chain.run(input_documents=documents, question=query, callbacks=callbacks)
+    cache.put(query, ctx_hash, params, result, semantic=semantic)
+    return result
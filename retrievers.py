@@ -0,0 +1,148 @@
+"""
+Custom LangChain retrievers
+"""
+
+import re
+import math
+import time
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+from langchain.schema import BaseRetriever
+from docstore import iter_documents
+from config import RETRIEVAL_FETCH_K, RRF_K, RERANKER_MODEL, RERANK_BUDGET_MS
+
+logger = logging.getLogger("joels_angels.retrievers")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class LanguagePartitionedRetriever(BaseRetriever):
+    """Searches only the reference partitions for the requested languages.
+
+    ``partitions`` maps a language name to its own FAISS store; results from
+    each searched partition are merged by distance and the best ``k`` kept.
+    """
+
+    partitions: Dict[str, Any]
+    languages: List[str]
+    embedding: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        stores = [self.partitions[lang] for lang in dict.fromkeys(self.languages) if lang in self.partitions]
+        if not stores:
+            return []
+        vector = self.embedding.embed_query(query)
+        scored = []
+        for store in stores:
+            scored.extend(store.similarity_search_with_score_by_vector(vector, k=self.k))
+        # FAISS scores are L2 distances: smaller is closer
+        scored.sort(key=lambda pair: pair[1])
+        return [doc for doc, _ in scored[:self.k]]
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring.
+
+    Only keys and term statistics are held; ``fetch(key)`` loads the documents
+    a search returns.
+    """
+
+    def __init__(self, entries, fetch, k1=1.5, b=0.75):
+        self.fetch = fetch
+        self.k1 = k1
+        self.b = b
+        self.keys = []
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency)]
+        self.lengths = []
+        for i, (key, text) in enumerate(entries):
+            self.keys.append(key)
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    @classmethod
+    def from_vectorstore(cls, vectordb):
+        entries = ((id_, doc.page_content) for id_, doc in iter_documents(vectordb.docstore))
+        return cls(entries, vectordb.docstore.search)
+
+    def search(self, query, k):
+        n = len(self.keys)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:k]
+        return [self.fetch(self.keys[i]) for i, _ in best]
+
+
+def load_reranker(model_name=RERANKER_MODEL):
+    """Cross-encoder for the rerank stage, or None when disabled or unavailable."""
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name, device="cpu")
+    except Exception as e:
+        logger.warning("Reranker %s unavailable, using fused ranking only: %s", model_name, e)
+        return None
+
+
+class HybridRetriever(BaseRetriever):
+    """BM25 and FAISS results fused with reciprocal rank fusion, optionally reranked.
+
+    The cross-encoder scores fused candidates in small batches until
+    ``rerank_budget_ms`` is spent; anything it didn't reach keeps its fused
+    position after the reranked ones.
+    """
+
+    vectorstore: Any
+    bm25: Any
+    k: int = 3
+    fetch_k: int = RETRIEVAL_FETCH_K
+    rrf_k: int = RRF_K
+    reranker: Optional[Any] = None
+    rerank_budget_ms: int = RERANK_BUDGET_MS
+    rerank_batch: int = 8
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        fused, by_key = defaultdict(float), {}
+        for results in (self.vectorstore.similarity_search(query, k=self.fetch_k), self.bm25.search(query, self.fetch_k)):
+            for rank, doc in enumerate(results):
+                key = (doc.metadata.get("source"), doc.page_content)
+                by_key.setdefault(key, doc)
+                fused[key] += 1.0 / (self.rrf_k + rank + 1)
+        candidates = [by_key[key] for key in sorted(fused, key=fused.get, reverse=True)]
+        if self.reranker is None:
+            return candidates[:self.k]
+        return self._rerank(query, candidates)[:self.k]
+
+    def _rerank(self, query, candidates):
+        deadline = time.perf_counter() + self.rerank_budget_ms / 1000
+        scored = []
+        for start in range(0, len(candidates), self.rerank_batch):
+            if time.perf_counter() >= deadline:
+                break
+            batch = candidates[start:start + self.rerank_batch]
+            scores = self.reranker.predict([(query, doc.page_content) for doc in batch])
+            scored.extend(zip(batch, scores))
+        if len(scored) < len(candidates):
+            logger.debug("Rerank budget spent after %d of %d candidates", len(scored), len(candidates))
+        reranked = [doc for doc, _ in sorted(scored, key=lambda pair: pair[1], reverse=True)]
+        return reranked + candidates[len(scored):]
+
+
+def build_template_retriever(vectordb, k, reranker=None):
+    return HybridRetriever(vectorstore=vectordb, bm25=BM25Index.from_vectorstore(vectordb), k=k, reranker=reranker)
@@ -0,0 +1,154 @@
+"""
+Patch-based revisions for the feedback loops
+
+Instead of regenerating a whole contract for every "Submit changes", the
+draft is split into numbered sections, the model answers with a small JSON
+list of edits against those numbers, and the edits are applied locally. If the
+model's answer can't be parsed or applied, the caller's full-regeneration
+fallback runs instead.
+"""
+
+import re
+import json
+import difflib
+import logging
+from dataclasses import dataclass, field
+from langchain_core.messages import HumanMessage
+from chunking import CLAUSE_HEADING
+from context import count_tokens
+
+logger = logging.getLogger("joels_angels.revision")
+
+OPERATIONS = ("replace", "insert_after", "delete")
+
+REVISION_PROMPT = """You are revising a legal document. Apply the requested changes by editing only the sections that need to change.
+
+The document is split into numbered sections, each introduced by a marker like [§3]. Keep the document's language and formatting.
+
+Requested changes: {feedback}
+
+Respond with JSON only, in this form:
+{{"edits": [
+  {{"op": "replace", "section": 3, "text": "full new text of section 3"}},
+  {{"op": "insert_after", "section": 5, "text": "text of a new section placed after section 5 (use 0 for the very start)"}},
+  {{"op": "delete", "section": 7}}
+]}}
+Return {{"edits": []}} if nothing needs to change.
+
+Document:
+{document}"""
+
+
+@dataclass
+class RevisionResult:
+    text: str
+    mode: str  # "patch" or "full"
+    edits: list = field(default_factory=list)
+    diff: str = ""
+
+
+def split_sections(text):
+    """Split a draft at clause headings into consecutive sections that join back to ``text``."""
+    starts = sorted({0} | {m.start() for m in CLAUSE_HEADING.finditer(text)})
+    return [text[s:e] for s, e in zip(starts, starts[1:] + [len(text)]) if text[s:e]]
+
+
+def split_parts(text, budget):
+    """Group consecutive sections into parts of at most ``budget`` tokens.
+
+    Sections are never cut, so a single section longer than the budget is a part
+    of its own. The parts join back to ``text``.
+    """
+    parts, size = [], 0
+    for section in split_sections(text):
+        tokens = count_tokens(section)
+        if parts and size + tokens <= budget:
+            parts[-1] += section
+            size += tokens
+        else:
+            parts.append(section)
+            size = tokens
+    return parts or [text]
+
+
+def number_sections(sections):
+    return "\n".join(f"[§{i}] {section.rstrip()}" for i, section in enumerate(sections, start=1))
+
+
+def parse_edits(response):
+    """Pull the edit list out of a model response, tolerating code fences and prose around the JSON."""
+    match = re.search(r"\{.*\}", response, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON object in revision response")
+    edits = json.loads(match.group(0)).get("edits")
+    if not isinstance(edits, list):
+        raise ValueError("Revision response has no 'edits' list")
+    for edit in edits:
+        if not isinstance(edit, dict):
+            raise ValueError(f"Invalid edit: {edit!r}")
+        section = edit.get("section")
+        if edit.get("op") not in OPERATIONS or not isinstance(section, int) or isinstance(section, bool):
+            raise ValueError(f"Invalid edit: {edit}")
+        if edit["op"] != "delete" and not isinstance(edit.get("text"), str):
+            raise ValueError(f"Edit without text: {edit}")
+    return edits
+
+
+def _as_section(text, original):
+    # Keep the blank-line spacing the original section had after it
+    trailing = original[len(original.rstrip()):] or "\n\n"
+    return text.strip() + trailing
+
+
+def apply_edits(sections, edits):
+    """Apply edits (section numbers refer to the original draft) and return the new text."""
+    count = len(sections)
+    replaced, deleted, inserted = {}, set(), {}
+    for edit in edits:
+        number = edit["section"]
+        lowest = 0 if edit["op"] == "insert_after" else 1
+        if not lowest <= number <= count:
+            raise ValueError(f"Edit targets unknown section {number}")
+        if edit["op"] == "replace":
+            replaced[number] = edit["text"]
+        elif edit["op"] == "delete":
+            deleted.add(number)
+        else:
+            inserted.setdefault(number, []).append(edit["text"])
+
+    anchor = sections[0] if sections else ""
+    parts = [_as_section(text, anchor) for text in inserted.get(0, [])]
+    for number, section in enumerate(sections, start=1):
+        if number in replaced:
+            parts.append(_as_section(replaced[number], section))
+        elif number not in deleted:
+            parts.append(section)
+        parts.extend(_as_section(text, section) for text in inserted.get(number, []))
+    return "".join(parts)
+
+
+def render_diff(old, new, context=2):
+    return "\n".join(difflib.unified_diff(
+        old.splitlines(), new.splitlines(), fromfile="previous", tofile="revised", lineterm="", n=context
+    ))
+
+
+def revise(previous, feedback, llm, fallback, callbacks=None):
+    """Revise ``previous`` according to ``feedback`` with targeted edits.
+
+    ``fallback(callbacks)`` regenerates the whole document and is used when the
+    draft has no usable structure or the model's edits can't be applied. Only
+    the fallback streams to ``callbacks``; the JSON edit list is never shown.
+    """
+    sections = split_sections(previous)
+    if len(sections) > 1:
+        prompt = REVISION_PROMPT.format(feedback=feedback, document=number_sections(sections))
+        try:
+            response = llm([HumanMessage(content=prompt)]).content
+            edits = parse_edits(response)
+            revised = apply_edits(sections, edits)
+            return RevisionResult(revised, "patch", edits, render_diff(previous, revised))
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            logger.warning("Falling back to full regeneration: %s", e)
+    revised = fallback(callbacks)
+    return RevisionResult(revised, "full", diff=render_diff(previous, revised))
@@ -0,0 +1,41 @@
+"""
+Callback handlers that surface LLM tokens while a completion is still running
+"""
+
+import time
+from langchain.callbacks.base import BaseCallbackHandler
+
+
+class TokenBuffer(BaseCallbackHandler):
+    """Collects streamed tokens; safe to use from worker threads."""
+
+    def __init__(self):
+        self.text = ""
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.text += token
+
+
+class StreamlitTokenHandler(TokenBuffer):
+    """Renders streamed tokens into a Streamlit placeholder.
+
+    Must run on the script thread. Redraws are throttled to ``min_interval``
+    seconds so long completions don't flood the websocket.
+    """
+
+    def __init__(self, placeholder, min_interval=0.05, cursor="▌"):
+        super().__init__()
+        self.placeholder = placeholder
+        self.min_interval = min_interval
+        self.cursor = cursor
+        self._last_render = 0.0
+
+    def on_llm_new_token(self, token, **kwargs):
+        super().on_llm_new_token(token, **kwargs)
+        now = time.monotonic()
+        if now - self._last_render >= self.min_interval:
+            self.placeholder.markdown(self.text + self.cursor)
+            self._last_render = now
+
+    def on_llm_end(self, response, **kwargs):
+        self.placeholder.markdown(self.text)
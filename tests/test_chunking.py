@@ -0,0 +1,52 @@
+import os
+import sys
+from langchain.docstore.document import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunking import split_clauses
+
+AGREEMENT = (
+    "MASTER SERVICES AGREEMENT\n\n"
+    "ARTICLE 1. Definitions\n"
+    "Capitalised terms have the meanings given below.\n\n"
+    "1.1 Services. The services described in each Statement of Work.\n\n"
+    "ARTICLE 2. Payment\n"
+    "2.1 Fees. The Client shall pay the fees within thirty days.\n\n"
+    "2.2 Taxes. Fees exclude applicable taxes.\n"
+)
+
+
+def _chunks(text, **kwargs):
+    return split_clauses(Document(page_content=text, metadata={"source": "msa"}), **kwargs)
+
+
+def test_offsets_point_back_into_the_source():
+    for chunk in _chunks(AGREEMENT, max_chars=80, overlap=0):
+        start, end = chunk.metadata["start_index"], chunk.metadata["end_index"]
+        assert AGREEMENT[start:end] == chunk.page_content
+        assert chunk.metadata["source"] == "msa"
+
+
+def test_chunks_start_at_clause_headings():
+    chunks = _chunks(AGREEMENT, max_chars=80, overlap=0)
+    assert [chunk.metadata["section"] for chunk in chunks][:3] == [
+        "MASTER SERVICES AGREEMENT", "ARTICLE 1. Definitions", "1.1 Services. The services described in each Statement of Work."
+    ]
+    assert all(len(chunk.page_content) <= 80 for chunk in chunks)
+
+
+def test_short_clauses_are_packed_together():
+    chunks = _chunks(AGREEMENT, max_chars=10_000, overlap=0)
+    assert len(chunks) == 1
+    assert chunks[0].page_content == AGREEMENT.strip()
+
+
+def test_oversized_clause_is_windowed_with_overlap():
+    clause = "1. Scope. " + " ".join(f"word{i}" for i in range(400))
+    chunks = _chunks(clause, max_chars=300, overlap=50)
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.metadata["start_index"] < previous.metadata["end_index"]
+        assert clause[chunk.metadata["start_index"]:chunk.metadata["end_index"]] == chunk.page_content
+    assert all(len(chunk.page_content) <= 300 for chunk in chunks)
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("language_tool_python")
+pytest.importorskip("textstat")
+
+from actqm import KeywordMatcher
+
+
+def test_hits_report_offsets_into_the_text():
+    text = "The Term of this Agreement. Termination for cause."
+    hits = KeywordMatcher(["Term", "Termination", "Agreement"]).find(text)
+    assert hits["Term"] == [(4, 8), (28, 32)]
+    assert hits["Termination"] == [(28, 39)]
+    assert hits["Agreement"] == [(17, 26)]
+    for keyword, spans in hits.items():
+        assert all(text[start:end].lower() == keyword.lower() for start, end in spans)
+
+
+def test_overlapping_and_suffix_keywords_are_all_found():
+    hits = KeywordMatcher(["he", "she", "hers"]).find("ushers")
+    assert hits == {"she": [(1, 4)], "he": [(2, 4)], "hers": [(2, 6)]}
+
+
+def test_matching_is_case_insensitive_and_skips_absent_keywords():
+    hits = KeywordMatcher(["Confidential Information", "Indemnity"]).find("CONFIDENTIAL INFORMATION shall")
+    assert hits == {"Confidential Information": [(0, 24)]}
+
+
+def test_offsets_survive_characters_that_lowercase_to_several():
+    text = "İstanbul venue. Governing Law applies."
+    start, end = KeywordMatcher(["governing law"]).find(text)["governing law"][0]
+    assert text[start:end] == "Governing Law"
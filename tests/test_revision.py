@@ -0,0 +1,91 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from revision import apply_edits, parse_edits, revise, split_sections
+
+DRAFT = (
+    "SERVICES AGREEMENT\n\n"
+    "1. Services. The Provider shall perform the Services.\n\n"
+    "2. Fees. The Client shall pay USD 10,000.\n\n"
+    "3. Term. This Agreement lasts one year.\n"
+)
+
+
+def test_split_sections_joins_back_to_the_draft():
+    sections = split_sections(DRAFT)
+    assert len(sections) == 4
+    assert "".join(sections) == DRAFT
+
+
+def test_parse_edits_tolerates_fences_and_prose():
+    response = 'Here you go:\n```json\n{"edits": [{"op": "delete", "section": 2}]}\n```'
+    assert parse_edits(response) == [{"op": "delete", "section": 2}]
+
+
+@pytest.mark.parametrize("response", [
+    "no json here",
+    '{"changes": []}',
+    '{"edits": ["x"]}',
+    '{"edits": [{"op": "rewrite", "section": 1, "text": "x"}]}',
+    '{"edits": [{"op": "replace", "section": "2", "text": "x"}]}',
+    '{"edits": [{"op": "replace", "section": true, "text": "x"}]}',
+    '{"edits": [{"op": "replace", "section": 2, "text": 5}]}',
+])
+def test_parse_edits_rejects_malformed_replies(response):
+    with pytest.raises(ValueError):
+        parse_edits(response)
+
+
+def test_apply_edits_replaces_inserts_and_deletes():
+    sections = split_sections(DRAFT)
+    revised = apply_edits(sections, [
+        {"op": "replace", "section": 3, "text": "2. Fees. The Client shall pay USD 12,500."},
+        {"op": "insert_after", "section": 0, "text": "DRAFT"},
+        {"op": "delete", "section": 4},
+    ])
+    assert revised.startswith("DRAFT\n\nSERVICES AGREEMENT")
+    assert "USD 12,500" in revised and "USD 10,000" not in revised
+    assert "Term." not in revised
+    assert "1. Services." in revised
+
+
+def test_apply_edits_rejects_unknown_sections():
+    with pytest.raises(ValueError):
+        apply_edits(split_sections(DRAFT), [{"op": "delete", "section": 9}])
+
+
+class _Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+def test_revise_falls_back_on_malformed_edits():
+    def llm(messages):
+        return _Reply('{"edits": ["x"]}')
+
+    result = revise(DRAFT, "raise the fee", llm, lambda callbacks: "regenerated")
+    assert result.mode == "full"
+    assert result.text == "regenerated"
+
+
+def test_revise_applies_valid_edits():
+    def llm(messages):
+        return _Reply('{"edits": [{"op": "delete", "section": 4}]}')
+
+    result = revise(DRAFT, "drop the term clause", llm, lambda callbacks: pytest.fail("fallback used"))
+    assert result.mode == "patch"
+    assert "Term." not in result.text
+
+
+def test_split_parts_keeps_whole_sections_within_budget():
+    from context import count_tokens
+    from revision import split_parts
+    sections = split_sections(DRAFT)
+    budget = max(count_tokens(s) for s in sections) + 1
+    parts = split_parts(DRAFT, budget)
+    assert len(parts) > 1
+    assert "".join(parts) == DRAFT
+    assert split_parts(DRAFT, 10 ** 6) == [DRAFT]
@@ -0,0 +1,87 @@
+import os
+import sys
+import hashlib
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_factory import INDEX_TYPES
+from utils import update_vector_store
+
+# Enough single-chunk files for IVFPQ to train a real IVF index rather than fall back to Flat
+N_FILES = 700
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic random vectors per text, so a text's own vector finds it."""
+
+    def _vector(self, text):
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=16).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def _write(folder, i, text):
+    with open(os.path.join(folder, f"t{i:04d}.txt"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_update_after_delete_keeps_vectors_mapped_to_their_chunks(tmp_path, index_type):
+    folder, persist = str(tmp_path / "templates"), str(tmp_path / "embeddings")
+    os.makedirs(folder)
+    for i in range(N_FILES):
+        _write(folder, i, f"Template {i} clause text")
+    embedding = HashEmbeddings()
+    update_vector_store(folder, persist, embedding, index_type=index_type)
+
+    os.remove(os.path.join(folder, "t0003.txt"))
+    _write(folder, 7, "Template 7 clause text, revised")
+    _write(folder, N_FILES, "A brand new template")
+    vectordb = update_vector_store(folder, persist, embedding, index_type=index_type)
+
+    ids = set(vectordb.index_to_docstore_id.values())
+    assert vectordb.index.ntotal == len(ids) == N_FILES
+    texts = [doc.page_content for _, doc in vectordb.docstore.iter_documents()]
+    assert "Template 3 clause text" not in texts
+    found = 0
+    for text in texts:
+        scores, positions = vectordb.index.search(np.array([embedding.embed_query(text)], dtype=np.float32), 1)
+        assert vectordb.index_to_docstore_id[int(positions[0][0])] in ids
+        found += vectordb.docstore.search(vectordb.index_to_docstore_id[int(positions[0][0])]).page_content == text
+    # Quantized types may miss a few neighbours; a broken id map misses almost all
+    assert found >= 0.9 * len(texts)
+
+
+def test_interrupted_update_keeps_previous_index(tmp_path, monkeypatch):
+    import utils
+    folder, persist = str(tmp_path / "templates"), str(tmp_path / "embeddings")
+    os.makedirs(folder)
+    for i in range(20):
+        _write(folder, i, f"Template {i} clause text")
+    embedding = HashEmbeddings()
+    update_vector_store(folder, persist, embedding)
+
+    os.remove(os.path.join(folder, "t0003.txt"))
+    _write(folder, 20, "A brand new template")
+
+    def crash(persist_path, version_path):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(utils, "publish_version", crash)
+    with pytest.raises(KeyboardInterrupt):
+        update_vector_store(folder, persist, embedding)
+    monkeypatch.undo()
+
+    vectordb = utils.load_faiss_index(persist, embedding)
+    assert vectordb.index.ntotal == len(vectordb.docstore) == 20
+    assert vectordb.similarity_search("Template 3 clause text", k=1)[0].page_content == "Template 3 clause text"
+    vectordb = update_vector_store(folder, persist, embedding)
+    assert vectordb.similarity_search("A brand new template", k=1)[0].page_content == "A brand new template"
+    assert len([entry for entry in os.listdir(persist) if entry.startswith("v-")]) == 1
@@ -0,0 +1,94 @@
+"""
+Chunked, parallel translation of long documents
+"""
+
+import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import TRANSLATION_CHUNK_TOKENS, TRANSLATION_MAX_WORKERS
+from streaming import TokenBuffer
+from context import count_tokens
+
+# Paragraphs that open a new clause/section; preferred places to cut a chunk
+SECTION_HEADING = re.compile(r"^\s*(ARTICLE|Article|SECTION|Section|Clause|\d+(\.\d+)*[.)]?\s+[A-Z])")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _split_long_paragraph(paragraph, max_tokens):
+    pieces, current = [], ""
+    for sentence in SENTENCE_END.split(paragraph):
+        if current and count_tokens(current + " " + sentence) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(paragraphs, max_tokens=TRANSLATION_CHUNK_TOKENS):
+    """Group paragraphs into chunks of roughly ``max_tokens``.
+
+    Chunks never split a paragraph unless it alone exceeds the budget, and a
+    chunk that is at least half full is closed early at a section heading.
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in paragraphs:
+        tokens = count_tokens(paragraph)
+        at_heading = SECTION_HEADING.match(paragraph) and size > max_tokens // 2
+        if current and (size + tokens > max_tokens or at_heading):
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        if tokens > max_tokens:
+            chunks.extend(_split_long_paragraph(paragraph, max_tokens))
+            continue
+        current.append(paragraph)
+        size += tokens
+    if current and any(p.strip() for p in current):
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def translate_chunks(chunks, translate_chunk, max_workers=TRANSLATION_MAX_WORKERS, on_update=None, poll_interval=0.2):
+    """Translate ``chunks`` concurrently and return the results in document order.
+
+    ``translate_chunk(chunk, callbacks)`` runs on a worker thread; its streamed
+    tokens are buffered and ``on_update(text, done, total)`` is called from the
+    calling thread with the in-order translated prefix (finished chunks plus the
+    partial next one), so it may safely update Streamlit elements.
+    """
+    results = [None] * len(chunks)
+    buffers = [TokenBuffer() for _ in chunks]
+
+    def rendered_prefix():
+        parts = []
+        for result, buffer in zip(results, buffers):
+            if result is None:
+                if buffer.text:
+                    parts.append(buffer.text)
+                break
+            parts.append(result)
+        return "\n".join(parts)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            # Copy the caller's context so LLM calls keep its session/priority tags
+            executor.submit(contextvars.copy_context().run, translate_chunk, chunk, [buffers[i]]): i
+            for i, chunk in enumerate(chunks)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            if on_update:
+                on_update(rendered_prefix(), len(futures) - len(pending), len(chunks))
+    return "\n".join(results)
+
+
+def chunk_prompt(chunk, target_lang):
+    return (
+        f"Translate the following contract excerpt into {target_lang.upper()} using similar legal structure and terminology "
+        f"as seen in the reference documents. Keep the paragraph breaks and return only the translation:\n\n{chunk}"
+    )
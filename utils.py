@@ -1,35 +1,267 @@
 import os
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.embeddings import HuggingFaceEmbeddings
+import json
+import hashlib
+import shutil
+import tempfile
+from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
+from embedding_engine import BatchedEmbeddings
 from langchain.docstore.document import Document
-from langchain_community.document_loaders import TextLoader
+from langchain_community.document_loaders import TextLoader, Docx2txtLoader
+from index_factory import build_faiss_store, configure_search, supports_remove
+from ingest import iter_files, iter_file_chunks, add_to_index, with_random_ids
+from docstore import (
+    SQLiteDocstore, DOCSTORE_FILE, current_path, has_index, load_index, new_version, publish_version, save_index
+)
+from config import TEMPLATE_INDEX_TYPE
+
+MANIFEST_FILE = "manifest.json"
+
+def load_contract(folder_path, filename):
+    with open(os.path.join(folder_path, filename), "r", encoding="utf-8") as file:
+        text = file.read()
+    metadata = {"source": filename.split(".")[0]}
+    return Document(page_content=text, metadata=metadata)
 
 def load_contracts_from_folder(folder_path="contract_templates"):
-    docs = []
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".txt"):
-            with open(os.path.join(folder_path, filename), "r", encoding="utf-8") as file:
-                text = file.read()
-                metadata = {"source": filename.split(".")[0]}
-                docs.append(Document(page_content=text, metadata=metadata))
-    return docs
+    return [load_contract(folder_path, filename) for filename in iter_files(folder_path)]
 
-def build_vector_store(docs, persist_path="embeddings"):
+def split_contracts(docs):
     splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    chunks = splitter.split_documents(docs)
-    embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vectordb = FAISS.from_documents(chunks, embedding)
-    vectordb.save_local(persist_path)
+    return splitter.split_documents(docs)
+
+def iter_contract_chunks(folder_path, filename):
+    """Template chunks of one file, read window by window."""
+    metadata = {"source": filename.split(".")[0]}
+    return iter_file_chunks(os.path.join(folder_path, filename), lambda doc: split_contracts([doc]), metadata)
+
+def build_vector_store(docs, persist_path="embeddings"):
+    chunks = split_contracts(docs)
+    embedding = BatchedEmbeddings()
+    vectordb = build_faiss_store(chunks, embedding)
+    save_index(vectordb, persist_path)
     return vectordb
 
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _load_manifest(persist_path):
+    manifest_path = os.path.join(current_path(persist_path), MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _publish_index(vectordb, manifest, work_path, persist_path):
+    """Complete the version in ``work_path`` (index, docstore, manifest) and switch to it."""
+    save_index(vectordb, work_path)
+    vectordb.docstore.close()
+    with open(os.path.join(work_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    publish_version(persist_path, work_path)
+    legacy_manifest = os.path.join(persist_path, MANIFEST_FILE)
+    if os.path.exists(legacy_manifest):
+        os.remove(legacy_manifest)
+
+def update_vector_store(folder_path="contract_templates", persist_path="embeddings", embedding=None,
+                        index_type=TEMPLATE_INDEX_TYPE):
+    """Bring the persisted template index in line with ``folder_path``.
+
+    A manifest next to ``index.faiss`` records each file's hash and chunk ids, so
+    only new or changed files are embedded and deleted files have their vectors
+    removed. An index without a (consistent) manifest, of a different
+    ``index_type``, in the old pickle format, or one that can't delete vectors
+    (HNSW, IVF) is rebuilt instead. Updates are written as a new version
+    directory and published with one rename; the result is returned memory-mapped.
+    """
+    embedding = embedding or BatchedEmbeddings()
+    current = {filename: file_hash(os.path.join(folder_path, filename)) for filename in iter_files(folder_path)}
+    manifest = _load_manifest(persist_path)
+    vectordb = None
+    if manifest is not None and has_index(persist_path):
+        vectordb = load_faiss_index(persist_path, embedding)
+        if vectordb.index.ntotal != manifest.get("ntotal"):
+            print(f"⚠️ Index in '{persist_path}' does not match its manifest, rebuilding")
+            vectordb = None
+        elif manifest.get("index_type", "Flat") != index_type:
+            print(f"🔁 Switching '{persist_path}' from {manifest.get('index_type', 'Flat')} to {index_type}, rebuilding")
+            vectordb = None
+    if vectordb is None:
+        manifest = {"files": {}}
+
+    known = manifest["files"]
+    stale_ids = [
+        chunk_id
+        for filename, entry in known.items()
+        if current.get(filename) != entry["hash"]
+        for chunk_id in entry["ids"]
+    ]
+    changed = [filename for filename, digest in current.items() if known.get(filename, {}).get("hash") != digest]
+    if vectordb is not None and not stale_ids and not changed:
+        return vectordb
+
+    work_path = new_version(persist_path)
+    published = False
+    work_docstore = os.path.join(work_path, DOCSTORE_FILE)
+    if vectordb is not None:
+        vectordb.docstore.close()
+        if stale_ids and not supports_remove(vectordb.index):
+            stale_ids, changed, known = [], list(current), {}
+            vectordb = None
+        else:
+            # The mapped copy is read-only; update a full copy of the index and docstore
+            shutil.copyfile(os.path.join(current_path(persist_path), DOCSTORE_FILE), work_docstore)
+            vectordb = load_faiss_index(persist_path, embedding, mmap=False, docstore_path=work_docstore)
+    if stale_ids:
+        vectordb.delete(stale_ids)
+    files = {filename: entry for filename, entry in known.items() if current.get(filename) == entry["hash"]}
+
+    def changed_chunks():
+        for filename in changed:
+            digest = current[filename]
+            files[filename] = {"hash": digest, "ids": []}
+            for i, chunk in enumerate(iter_contract_chunks(folder_path, filename)):
+                chunk_id = f"{filename}:{digest[:12]}:{i}"
+                files[filename]["ids"].append(chunk_id)
+                yield chunk_id, chunk
+
+    try:
+        # Embedded and added in bounded batches as files are read
+        vectordb = add_to_index(vectordb, changed_chunks(), embedding, index_type,
+                                docstore=None if vectordb is not None else SQLiteDocstore(work_docstore))
+        if vectordb is None:
+            return None
+        manifest = {"files": files, "ntotal": vectordb.index.ntotal, "index_type": index_type}
+        _publish_index(vectordb, manifest, work_path, persist_path)
+        published = True
+    finally:
+        if not published:
+            shutil.rmtree(work_path, ignore_errors=True)
+    print(f"✅ Indexed {len(changed)} new/changed files and removed {len(stale_ids)} stale chunks in '{persist_path}'")
+    return load_faiss_index(persist_path, embedding)
+
 def load_docs_from_folder(folder_path):
     documents = []
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".txt"):
-            fpath = os.path.join(folder_path, filename)
-            try:
-                documents.extend(TextLoader(fpath).load())
-            except Exception as e:
-                print(f"❌ Error loading {fpath}: {e}")
+    for filename in iter_files(folder_path):
+        fpath = os.path.join(folder_path, filename)
+        try:
+            documents.extend(TextLoader(fpath).load())
+        except Exception as e:
+            print(f"❌ Error loading {fpath}: {e}")
     return documents
+
+def folder_hash(folder_path, suffixes=(".txt",)):
+    """Content hash over the names and bytes of every matching file in a folder."""
+    digest = hashlib.sha256()
+    for filename in iter_files(folder_path, suffixes):
+        digest.update(filename.encode("utf-8"))
+        with open(os.path.join(folder_path, filename), "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def load_faiss_index(persist_path, embedding, mmap=True, docstore_path=None):
+    """Load a saved FAISS store, memory-mapping the vectors when FAISS supports it.
+
+    Documents stay in the SQLite docstore and are read only when a search
+    returns them. Mapped indexes are read-only, so only use ``mmap`` for
+    indexes that are never updated in place.
+    """
+    vectordb = load_index(persist_path, embedding, mmap=mmap, docstore_path=docstore_path)
+    configure_search(vectordb.index)
+    return vectordb
+
+def load_or_build_hashed_index(folder_path, persist_root, embedding, load_documents,
+                               suffixes=(".txt",), content_hash=None):
+    """Load the FAISS index for a folder, re-embedding only when its files change.
+
+    Indexes live under ``<persist_root>/<hash>`` and are loaded memory-mapped;
+    older hashes are pruned once a fresh index has been written.
+    """
+    content_hash = (content_hash or folder_hash(folder_path, suffixes))[:16]
+    persist_path = os.path.join(persist_root, content_hash)
+    if has_index(persist_path):
+        return load_faiss_index(persist_path, embedding)
+    if os.path.exists(persist_path):
+        # Written in the old pickle format; rebuilt rather than unpickled
+        shutil.rmtree(persist_path, ignore_errors=True)
+
+    # Build in a scratch dir and rename so concurrent processes never see half an index.
+    # ``load_documents`` may be a generator; chunks are embedded in batches as it yields
+    os.makedirs(persist_root, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=persist_root, prefix=".tmp-")
+    docstore = SQLiteDocstore(os.path.join(tmp_path, DOCSTORE_FILE))
+    vectordb = add_to_index(None, with_random_ids(load_documents(folder_path)), embedding, "Flat", docstore=docstore)
+    if vectordb is not None:
+        save_index(vectordb, tmp_path)
+    docstore.close()
+    if vectordb is None:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return None
+    try:
+        os.rename(tmp_path, persist_path)
+    except OSError:
+        # Another process already published this hash
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    for entry in os.listdir(persist_root):
+        if entry != content_hash and not entry.startswith(".tmp-"):
+            shutil.rmtree(os.path.join(persist_root, entry), ignore_errors=True)
+    return load_faiss_index(persist_path, embedding)
+
+def load_client_chunks(folder_path):
+    """Clause chunks of every client file, streamed file by file."""
+    from chunking import split_clauses
+    for filename in iter_files(folder_path):
+        fpath = os.path.join(folder_path, filename)
+        try:
+            yield from iter_file_chunks(fpath, split_clauses, {"source": fpath})
+        except Exception as e:
+            print(f"❌ Error loading {fpath}: {e}")
+
+def load_or_build_client_index(folder_path, embedding, persist_root="embeddings/clients", content_hash=None):
+    from chunking import CHUNKER_VERSION
+    client = os.path.basename(os.path.normpath(folder_path))
+    # Chunking rules are part of the key so a new chunker invalidates old indexes
+    content_hash = content_hash or folder_hash(folder_path)
+    index_hash = hashlib.sha256(f"{content_hash}:{CHUNKER_VERSION}".encode("utf-8")).hexdigest()
+    return load_or_build_hashed_index(
+        folder_path, os.path.join(persist_root, client), embedding, load_client_chunks,
+        content_hash=index_hash
+    )
+
+def load_reference_docs(folder_path="reference_docs", filenames=None):
+    docs = []
+    for filename in filenames or sorted(os.listdir(folder_path)):
+        if filename.endswith(".docx"):
+            loaded = Docx2txtLoader(os.path.join(folder_path, filename)).load()
+            for doc in loaded:
+                doc.metadata["language"] = os.path.splitext(filename)[0]
+            docs.extend(loaded)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=80)
+    return text_splitter.split_documents(docs)
+
+def load_or_build_reference_indexes(embedding, folder_path="reference_docs", persist_root="embeddings/reference"):
+    """One index per reference language (``German.docx`` -> ``"German"``).
+
+    Each partition is hashed on its own file, so editing one reference only
+    re-embeds that language.
+    """
+    partitions = {}
+    for filename in sorted(os.listdir(folder_path)):
+        if filename.endswith(".docx"):
+            language = os.path.splitext(filename)[0]
+            vectordb = load_or_build_hashed_index(
+                folder_path, os.path.join(persist_root, language), embedding,
+                lambda folder, filename=filename: load_reference_docs(folder, [filename]),
+                content_hash=file_hash(os.path.join(folder_path, filename))
+            )
+            if vectordb is not None:
+                partitions[language] = vectordb
+    return partitions
+
+if __name__ == "__main__":
+    update_vector_store()
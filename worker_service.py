@@ -0,0 +1,282 @@
+"""
+Backend worker service for multi-process deployments
+
+The CPU-heavy work (embeddings, template retrieval, ACTQM scoring, DOCX
+rendering) can run in a separate service so several Streamlit front ends
+share one pool of worker processes instead of each competing for its own GIL.
+
+    WORKER_AUTHKEY=... python worker_service.py --address 127.0.0.1:6010 --processes 4
+    WORKER_AUTHKEY=... WORKER_ADDRESS=127.0.0.1:6010 streamlit run app.py
+
+Front ends talk to it over ``multiprocessing.connection`` (TCP or a Unix
+socket), which unpickles every message: both sides refuse to run without a
+private ``WORKER_AUTHKEY``, and TCP addresses without a host bind to
+localhost. LLM responses are already shared between processes through the
+SQLite response cache. Without ``WORKER_ADDRESS``, or when the service is
+unreachable, the same operations run in-process, so a single machine needs
+nothing extra.
+"""
+
+import logging
+import argparse
+import threading
+import multiprocessing
+from io import BytesIO
+from multiprocessing.connection import Client, Listener
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from config import (
+    WORKER_ADDRESS, WORKER_AUTHKEY, WORKER_PROCESSES, WORKER_TIMEOUT
+)
+
+logger = logging.getLogger("joels_angels.worker")
+
+TEMPLATES_PATH = "contract_templates"
+EMBED_PATH = "embeddings"
+
+
+# Placeholder SECRET_KEY from config.py; never acceptable as an authkey
+_DEFAULT_SECRET = "default-secret-key-change-in-production"
+
+
+def parse_address(address):
+    """``host:port`` (or a bare port, on localhost) for TCP, anything else is a Unix socket path."""
+    if address.isdigit():
+        return "127.0.0.1", int(address)
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def check_authkey(authkey):
+    if not authkey or authkey == _DEFAULT_SECRET:
+        raise ValueError("Set WORKER_AUTHKEY to a private secret to use the worker service")
+    return authkey.encode("utf-8")
+
+
+# Operations. Each worker process builds its own model and index on first use.
+
+_embeddings = None
+_template_retriever = None
+
+
+def _get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        from embedding_engine import BatchedEmbeddings
+        # Already one of several worker processes, so no nested process pool
+        _embeddings = BatchedEmbeddings(processes=1)
+    return _embeddings
+
+
+def _get_template_retriever():
+    global _template_retriever
+    if _template_retriever is None:
+        from utils import load_faiss_index
+        from retrievers import build_template_retriever, load_reranker
+        vectordb = load_faiss_index(EMBED_PATH, _get_embeddings(), mmap=False)
+        _template_retriever = build_template_retriever(vectordb, k=3, reranker=load_reranker())
+    return _template_retriever
+
+
+def embed_documents(texts):
+    return _get_embeddings().embed_documents(texts)
+
+
+def embed_query(text):
+    return _get_embeddings().embed_query(text)
+
+
+def retrieve_templates(query, k):
+    return _get_template_retriever().copy(update={"k": k}).invoke(query)
+
+
+def score_contract(text, contract_type):
+    from actqm import calculate_actqm
+    return calculate_actqm(text, contract_type)
+
+
+def render_docx(text):
+    from docx import Document
+    document = Document()
+    for para in text.split("\n"):
+        if para.strip():
+            document.add_paragraph(para.strip())
+    output = BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+OPERATIONS = {
+    "embed_documents": embed_documents,
+    "embed_query": embed_query,
+    "retrieve_templates": retrieve_templates,
+    "score_contract": score_contract,
+    "render_docx": render_docx,
+}
+
+
+def _run(operation, args):
+    return OPERATIONS[operation](*args)
+
+
+# Front-end side
+
+class LocalWorker:
+    """Runs every operation in the calling process; the stand-in when no service is configured."""
+
+    def call(self, operation, *args):
+        return _run(operation, args)
+
+    def embed_documents(self, texts):
+        return self.call("embed_documents", texts)
+
+    def embed_query(self, text):
+        return self.call("embed_query", text)
+
+    def retrieve_templates(self, query, k=3):
+        return self.call("retrieve_templates", query, k)
+
+    def score_contract(self, text, contract_type):
+        return self.call("score_contract", text, contract_type)
+
+    def render_docx(self, text):
+        return self.call("render_docx", text)
+
+
+class WorkerClient(LocalWorker):
+    """Sends operations to the worker service, one connection per calling thread.
+
+    Falls back to running the operation locally when the service can't be reached.
+    A call that times out is not retried, since the service may still be running it.
+    """
+
+    def __init__(self, address, authkey=WORKER_AUTHKEY, timeout=WORKER_TIMEOUT):
+        self.address = parse_address(address)
+        self.authkey = check_authkey(authkey)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, authkey=self.authkey)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def call(self, operation, *args):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((operation, args))
+                answered = conn.poll(self.timeout)
+                if answered:
+                    status, payload = conn.recv()
+                break
+            except (OSError, EOFError) as e:  # includes ConnectionError
+                self._drop_connection()
+                if attempt:
+                    logger.warning("Worker service unavailable (%s); running %s locally", e, operation)
+                    return super().call(operation, *args)
+        if not answered:
+            # A late answer would be read by the next call on this connection
+            self._drop_connection()
+            raise TimeoutError(f"worker did not answer {operation} within {self.timeout}s")
+        if status == "error":
+            raise RuntimeError(f"worker {operation} failed: {payload}")
+        return payload
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = WorkerClient(WORKER_ADDRESS) if WORKER_ADDRESS else LocalWorker()
+        return _worker
+
+
+class WorkerEmbeddings(Embeddings):
+    """LangChain embeddings computed by the worker service."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return get_worker().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return get_worker().embed_query(text)
+
+
+class WorkerTemplateRetriever(BaseRetriever):
+    """Contract template search executed by the worker service."""
+
+    k: int = 3
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return get_worker().retrieve_templates(query, self.k)
+
+
+# Service side
+
+def _serve_connection(conn, pool):
+    with conn:
+        while True:
+            try:
+                operation, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            if operation not in OPERATIONS:
+                conn.send(("error", f"unknown operation {operation!r}"))
+                continue
+            try:
+                conn.send(("ok", pool.submit(_run, operation, args).result()))
+            except Exception as e:
+                logger.exception("%s failed", operation)
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def serve(address=WORKER_ADDRESS, processes=WORKER_PROCESSES, authkey=WORKER_AUTHKEY):
+    from utils import update_vector_store
+    authkey = check_authkey(authkey)
+    endpoint = parse_address(address)
+    if isinstance(endpoint, tuple) and endpoint[0] not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning("Worker service reachable from other hosts on %s:%s", *endpoint)
+
+    # Spawned, not forked, so workers don't inherit the torch state loaded below
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    # Bring the template index up to date once, before worker processes open it read-only
+    update_vector_store(TEMPLATES_PATH, EMBED_PATH, _get_embeddings())
+
+    with Listener(endpoint, authkey=authkey) as listener:
+        print(f"✅ Worker service listening on {address} with {processes} processes")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError) as e:
+                # Failed handshakes (wrong authkey, port scans) shouldn't stop the service
+                logger.warning("Rejected connection: %s", e)
+                continue
+            threading.Thread(target=_serve_connection, args=(conn, pool), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the embedding/retrieval/scoring worker service.")
+    parser.add_argument("--address", default=WORKER_ADDRESS or "127.0.0.1:6010", help="host:port or Unix socket path")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.address, args.processes)
+
+
+if __name__ == "__main__":
+    main()